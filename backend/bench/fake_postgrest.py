@@ -0,0 +1,133 @@
+"""Minimal PostgREST stand-in served over real HTTP for benchmarks.
+
+Requests under /rest/v1/<table> are translated onto the SQLite storage
+backend's query builder, so the app's Supabase client talks to it exactly as
+it would to PostgREST. Every request can be delayed by a fixed latency to
+model the network round trip to a hosted database.
+"""
+import argparse
+import asyncio
+import json
+from contextlib import asynccontextmanager
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from db.sqlite_client import SQLiteClient, _parse_literal, _split_top_level
+
+FILTER_METHODS = {
+    "eq": "eq",
+    "neq": "neq",
+    "gt": "gt",
+    "gte": "gte",
+    "lt": "lt",
+    "lte": "lte",
+    "like": "like",
+    "ilike": "ilike",
+}
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+def _prefer(request: Request) -> dict:
+    prefer = {}
+    for part in request.headers.get("prefer", "").split(","):
+        if "=" in part:
+            key, value = part.strip().split("=", 1)
+            prefer[key] = value
+    return prefer
+
+def _apply_filters(query, request: Request):
+    for column, expression in request.query_params.multi_items():
+        if column in RESERVED_PARAMS:
+            continue
+        if column == "or":
+            query = query.or_(expression[1:-1])
+            continue
+        if column == "and":
+            # A one-clause OR is just that clause
+            for part in _split_top_level(expression[1:-1]):
+                query = query.or_(part)
+            continue
+        operator, value = expression.split(".", 1)
+        if operator == "in":
+            query = query.in_(column, [_parse_literal(v) for v in _split_top_level(value[1:-1])])
+        elif operator == "is":
+            query = query.is_(column, _parse_literal(value))
+        else:
+            query = getattr(query, FILTER_METHODS[operator])(column, value)
+    return query
+
+def _apply_modifiers(query, request: Request):
+    params = request.query_params
+    for term in filter(None, params.get("order", "").split(",")):
+        column, *flags = term.split(".")
+        nulls = None
+        if "nullsfirst" in flags:
+            nulls = True
+        elif "nullslast" in flags:
+            nulls = False
+        query = query.order(column, desc="desc" in flags, nullsfirst=nulls)
+    if "limit" in params:
+        query = query.limit(int(params["limit"]))
+    if "offset" in params:
+        query = query.offset(int(params["offset"]))
+    return query
+
+def create_app(db_path: str, latency: float = 0.0) -> Starlette:
+    client = SQLiteClient(db_path)
+
+    async def handle(request: Request) -> Response:
+        if latency:
+            await asyncio.sleep(latency)
+
+        table = request.path_params["table"]
+        prefer = _prefer(request)
+        returning = prefer.get("return", "representation")
+        builder = client.table(table)
+
+        if request.method == "GET":
+            query = builder.select(request.query_params.get("select", "*"), count=prefer.get("count"))
+        elif request.method == "POST":
+            body = json.loads(await request.body())
+            if prefer.get("resolution") == "merge-duplicates":
+                query = builder.upsert(body, on_conflict=request.query_params.get("on_conflict", ""), returning=returning)
+            else:
+                query = builder.insert(body, returning=returning)
+        elif request.method == "PATCH":
+            query = builder.update(json.loads(await request.body()), returning=returning)
+        else:
+            query = builder.delete(returning=returning)
+
+        query = _apply_modifiers(_apply_filters(query, request), request)
+        try:
+            result = await query.execute()
+        except Exception as e:
+            return Response(json.dumps({"message": str(e)}), status_code=400, media_type="application/json")
+
+        headers = {}
+        if result.count is not None:
+            headers["Content-Range"] = f"0-{max(len(result.data) - 1, 0)}/{result.count}"
+        status_code = 201 if request.method == "POST" else 200
+        if returning == "minimal":
+            return Response(status_code=204, headers=headers)
+        return Response(json.dumps(result.data, default=str), status_code=status_code, headers=headers, media_type="application/json")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        client.connect()
+        yield
+        client.close()
+
+    methods = ["GET", "POST", "PATCH", "DELETE"]
+    return Starlette(routes=[Route("/rest/v1/{table}", handle, methods=methods)], lifespan=lifespan)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a SQLite file through a PostgREST-compatible API")
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every request")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.db, args.latency_ms / 1000), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Import-time profile of the app, from ``python -X importtime``.
+
+Imports ``main`` in a fresh interpreter with no credentials configured (config
+is validated in the lifespan, not at import) and prints the total plus the
+slowest modules by cumulative and self time.
+
+Run from backend/: python -m bench.import_profile [--top 15] [--module main]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def profile(module: str) -> list:
+    env = {key: value for key, value in os.environ.items() if key not in ("JWT_SECRET", "PROJECT_URL", "SUPABASE_URL", "SUPABASE_ANON_KEY")}
+    env["PYTHONPATH"] = str(BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.splitlines()[-1] if result.stderr else f"import {module} failed")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    target = next((row for row in rows if row[0] == args.module), None)
+    if target:
+        print(f"import {args.module}: {target[2] / 1000:.1f} ms")
+
+    print(f"\nSlowest by cumulative time (top-level imports of {args.module}):")
+    direct = [row for row in rows if target and row[3] == target[3] + 1]
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda row: -row[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print("\nSlowest by self time:")
+    for name, self_us, _, _ in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
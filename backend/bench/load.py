@@ -0,0 +1,276 @@
+"""End-to-end API benchmark against a local PostgREST stand-in.
+
+Seeds a SQLite file, serves it through bench.fake_postgrest with injected
+latency, boots the app in-process pointed at it, and drives each endpoint
+with concurrent requests. Reports p50/p95/p99 latency, requests per second
+and database round trips per request (read from the Server-Timing header),
+and saves the results as JSON for comparison across commits.
+
+Run from backend/: python -m bench.load [--latency-ms 20] [--requests 200] ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+PASSWORD = "bench-password"
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def seed(db_path: str, users: int, cards: int, nested: int, password_hash: str) -> list:
+    """Write users with cards, hotels and transports straight into SQLite; returns the emails."""
+    from db.sqlite_client import SQLiteClient
+
+    client = SQLiteClient(db_path)
+    client.connect()
+    emails = []
+    try:
+        for u in range(users):
+            email = f"bench{u}@example.com"
+            user_id = str(uuid.uuid4())
+            await client.table("users").insert({
+                "id": user_id, "email": email, "password_hash": password_hash, "full_name": f"Bench {u}",
+            }).execute()
+            emails.append(email)
+
+            card_rows, hotel_rows, transport_rows = [], [], []
+            for c in range(cards):
+                card_id = str(uuid.uuid4())
+                start = date(2026, 1, 1) + timedelta(days=c % 365)
+                card_rows.append({
+                    "id": card_id, "user_id": user_id, "destination": f"City {c}",
+                    "start_date": start.isoformat(), "end_date": (start + timedelta(days=4)).isoformat(),
+                    "duration_days": 5, "status": random.choice(("planning", "booked", "completed")),
+                })
+                for n in range(nested):
+                    hotel_rows.append({
+                        "travel_card_id": card_id, "user_id": user_id, "hotel_name": f"Hotel {n}", "location": "Centre",
+                        "check_in_date": start.isoformat(), "check_out_date": (start + timedelta(days=2)).isoformat(),
+                        "room_type": "double", "price_per_night": 80.0, "total_cost": 160.0,
+                    })
+                    transport_rows.append({
+                        "travel_card_id": card_id, "user_id": user_id, "transport_type": "train", "origin": "A", "destination": "B",
+                        "departure_time": f"{start.isoformat()}T08:00", "arrival_time": f"{start.isoformat()}T12:00",
+                        "booking_reference": f"REF{n}", "cost": 40.0, "is_departure": n == 0,
+                    })
+            for table, rows in (("travel_cards", card_rows), ("hotels", hotel_rows), ("transports", transport_rows)):
+                if rows:
+                    await client.table(table).insert(rows, returning="minimal").execute()
+    finally:
+        client.close()
+    return emails
+
+def start_fake_postgrest(db_path: str, port: int, latency_ms: float) -> subprocess.Popen:
+    # A separate process, like the real database, so it doesn't share the GIL with the app
+    process = subprocess.Popen(
+        [sys.executable, "-m", "bench.fake_postgrest", "--db", db_path, "--port", str(port), "--latency-ms", str(latency_ms)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("fake PostgREST exited during startup")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake PostgREST did not start")
+
+def percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+_DB_CALLS = re.compile(r'db;dur=[\d.]+;desc="(\d+) calls"')
+
+async def run_scenario(make_request, total: int, concurrency: int) -> dict:
+    """Issue ``total`` requests, at most ``concurrency`` at a time."""
+    latencies, db_calls, errors = [], [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            match = _DB_CALLS.search(response.headers.get("server-timing", ""))
+            if match:
+                db_calls.append(int(match.group(1)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "db_calls_per_request": round(sum(db_calls) / len(db_calls), 2) if db_calls else None,
+    }
+
+async def drive(args, emails: list) -> dict:
+    import httpx
+    from main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def login(i):
+                return await client.post("/api/auth/login", json={"email": emails[i % len(emails)], "password": PASSWORD})
+
+            tokens = []
+            for email in emails:
+                response = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+                response.raise_for_status()
+                tokens.append({"Authorization": f"Bearer {response.json()['token']}"})
+
+            card_ids = []
+            for headers in tokens:
+                response = await client.get("/api/travel-cards", headers=headers)
+                response.raise_for_status()
+                card_ids.append([card["id"] for card in response.json()])
+
+            def user(i):
+                return i % len(tokens)
+
+            async def list_cards(i):
+                return await client.get("/api/travel-cards", headers=tokens[user(i)])
+
+            async def detail(i):
+                ids = card_ids[user(i)]
+                return await client.get(f"/api/travel-cards/{ids[i % len(ids)]}", headers=tokens[user(i)])
+
+            created = [[] for _ in tokens]
+
+            async def create(i):
+                start = date(2027, 1, 1) + timedelta(days=i % 300)
+                response = await client.post("/api/travel-cards", headers=tokens[user(i)], json={
+                    "destination": f"New {i}",
+                    "start_date": start.isoformat(),
+                    "end_date": (start + timedelta(days=3)).isoformat(),
+                    "status": "planning",
+                    "hotels": [{"hotel_name": f"Hotel {n}", "total_cost": 100.0} for n in range(args.nested)],
+                    "transports": [{"transport_type": "flight", "cost": 50.0} for _ in range(args.nested)],
+                })
+                if response.status_code == 200:
+                    created[user(i)].append(response.json()["id"])
+                return response
+
+            async def update(i):
+                ids = card_ids[user(i)]
+                return await client.put(f"/api/travel-cards/{ids[i % len(ids)]}", headers=tokens[user(i)], json={
+                    "status": ("planning", "booked")[i % 2],
+                    "hotels": [{"hotel_name": f"Hotel {n}", "room_type": ("single", "double")[i % 2]} for n in range(args.nested)],
+                })
+
+            async def delete(i):
+                u = user(i)
+                if not created[u]:
+                    # Nothing of ours left to delete; hit an unknown id so the request still counts
+                    return await client.delete(f"/api/travel-cards/{uuid.uuid4()}", headers=tokens[u])
+                return await client.delete(f"/api/travel-cards/{created[u].pop()}", headers=tokens[u])
+
+            scenarios = {
+                "login": login,
+                "list": list_cards,
+                "detail": detail,
+                "create": create,
+                "update": update,
+                "delete": delete,
+            }
+            for name, make_request in scenarios.items():
+                if args.only and name not in args.only:
+                    continue
+                results[name] = await run_scenario(make_request, args.requests, args.concurrency)
+                print(f"{name:<8} {results[name]}", flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API against a local PostgREST stand-in")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="delay injected into every database round trip")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--cards", type=int, default=100, help="seeded cards per user")
+    parser.add_argument("--nested", type=int, default=3, help="hotels and transports per card")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--no-cache", action="store_true", help="disable the in-process card cache")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--output", help="results file (default: bench/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    workdir = tempfile.mkdtemp(prefix="raahi-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    port = _free_port()
+
+    # Configure the app before it is imported; config is read at import time
+    os.environ.update({
+        "STORAGE_BACKEND": "supabase",
+        "PROJECT_URL": f"http://127.0.0.1:{port}",
+        "SUPABASE_URL": f"http://127.0.0.1:{port}",
+        "SUPABASE_ANON_KEY": "bench-anon-key",
+        "JWT_SECRET": os.environ.get("JWT_SECRET", "bench-secret"),
+        "BCRYPT_ROUNDS": os.environ.get("BCRYPT_ROUNDS", "4"),
+    })
+    if args.no_cache:
+        os.environ["CARD_CACHE_TTL_SECONDS"] = "0"
+
+    from utils.password import hash_password
+    emails = asyncio.run(seed(db_path, args.users, args.cards, args.nested, hash_password(PASSWORD, int(os.environ["BCRYPT_ROUNDS"]))))
+
+    fake = start_fake_postgrest(db_path, port, args.latency_ms)
+    try:
+        results = asyncio.run(drive(args, emails))
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    output = Path(args.output) if args.output else BENCH_DIR / "results" / f"{report['commit']}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Saved {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Per-card serialization cost: model-per-card path vs. the bulk render path.
+
+Run from backend/: python -m bench.serialization [--cards N] [--nested N] [--repeat N]
+"""
+import argparse
+import json
+import time
+import uuid
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from models.travel_card import TravelCardResponse
+from utils.etag import compute_etag
+from utils.serialization import render_cards
+
+def make_cards(count: int, nested: int) -> list:
+    cards = []
+    for i in range(count):
+        card_id = str(uuid.uuid4())
+        cards.append({
+            "id": card_id,
+            "user_id": "bench-user",
+            "destination": f"City {i}",
+            "start_date": "2026-05-01",
+            "end_date": "2026-05-07",
+            "duration_days": 7,
+            "status": "planning",
+            "hotels": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "travel_card_id": card_id,
+                    "hotel_name": f"Hotel {j}",
+                    "location": "Centre",
+                    "check_in_date": "2026-05-01",
+                    "check_out_date": "2026-05-03",
+                    "room_type": "double",
+                    "price_per_night": 80.5,
+                    "total_cost": 161.0,
+                }
+                for j in range(nested)
+            ],
+            "transports": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "travel_card_id": card_id,
+                    "transport_type": "train",
+                    "origin": "A",
+                    "destination": "B",
+                    "departure_time": "2026-05-01T08:00",
+                    "arrival_time": "2026-05-01T12:00",
+                    "booking_reference": f"REF{j}",
+                    "cost": 42.0,
+                    "is_departure": j == 0,
+                }
+                for j in range(nested)
+            ],
+        })
+    return cards
+
+_response_adapter = TypeAdapter(List[TravelCardResponse])
+
+def legacy(cards: list) -> bytes:
+    # What the routes did before: one model per card built from Python, a
+    # model_dump for the ETag, then response_model validation and encoding
+    models = [TravelCardResponse(**card) for card in cards]
+    etag_payload = json.dumps([m.model_dump(mode="json") for m in models], sort_keys=True, default=str)
+    compute_etag(etag_payload.encode())
+    validated = _response_adapter.validate_python(models, from_attributes=True)
+    return json.dumps(jsonable_encoder(_response_adapter.dump_python(validated, mode="json"))).encode()
+
+def fast(cards: list) -> bytes:
+    body = render_cards(cards)
+    compute_etag(body)
+    return body
+
+def measure(fn, cards: list, repeat: int) -> float:
+    fn(cards)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(cards)
+        best = min(best, time.perf_counter() - started)
+    return best / len(cards)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--nested", type=int, default=5, help="hotels and transports per card")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cards = make_cards(args.cards, args.nested)
+    before = measure(legacy, cards, args.repeat)
+    after = measure(fast, cards, args.repeat)
+    print(f"{args.cards} cards x {args.nested} hotels/transports, best of {args.repeat}")
+    print(f"  before: {before * 1e6:8.1f} us/card")
+    print(f"  after:  {after * 1e6:8.1f} us/card")
+    print(f"  speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
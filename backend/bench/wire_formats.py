@@ -0,0 +1,38 @@
+"""Bytes on the wire and encode CPU for each negotiated response format.
+
+Run from backend/: python -m bench.wire_formats [--cards N ...] [--nested N] [--repeat N]
+"""
+import argparse
+import time
+from bench.serialization import make_cards
+from utils.serialization import render_cards
+from utils.wire_format import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, encode_body, format_name
+
+def available_formats() -> list:
+    return [(media_type, coding) for media_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE) for coding in (None, "gzip", "br")]
+
+def measure(body: bytes, media_type: str, coding: str, repeat: int) -> tuple:
+    encoded = encode_body(body, media_type, coding)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode_body(body, media_type, coding)
+        best = min(best, time.perf_counter() - started)
+    return len(encoded), best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[1, 20, 200], help="list sizes to measure")
+    parser.add_argument("--nested", type=int, default=3, help="hotels and transports per card")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.cards:
+        body = render_cards(make_cards(count, args.nested))
+        print(f"{count} cards x {args.nested} hotels/transports ({len(body)} JSON bytes), best of {args.repeat}")
+        for media_type, coding in available_formats():
+            size, seconds = measure(body, media_type, coding, args.repeat)
+            print(f"  {format_name(media_type, coding):<13} {size:>9} bytes {size / len(body):6.1%}  {seconds * 1e3:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
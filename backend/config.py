@@ -8,13 +8,81 @@ SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
 
+# Storage backend: "supabase" (default) or "sqlite" for offline/single-node runs
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "raahi.db")
+
 # JWT Configuration
 JWT_SECRET = os.getenv("JWT_SECRET")
-if not JWT_SECRET:
-    raise ValueError("JWT_SECRET must be set in environment variables")
 
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
 
-if not PROJECT_URL or not SUPABASE_ANON_KEY or not SUPABASE_URL:
-    raise ValueError("Missing SUPABASE_URL, PROJECT_URL, or SUPABASE_ANON_KEY in .env file")
+# Verified-token cache (entries never outlive the token's own exp)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+# Password hashing (bcrypt work factor and its dedicated process pool)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Supabase HTTP connection pool (shared per worker)
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "10"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+# Most rows PostgREST returns per request (its max-rows setting, 1000 on
+# Supabase); reads that can return more are fetched in pages of this size
+POSTGREST_MAX_ROWS = int(os.getenv("POSTGREST_MAX_ROWS", "1000"))
+
+# In-process cache of assembled travel card responses
+CARD_CACHE_TTL_SECONDS = float(os.getenv("CARD_CACHE_TTL_SECONDS", "60"))
+CARD_CACHE_MAX_USERS = int(os.getenv("CARD_CACHE_MAX_USERS", "1024"))
+CARD_CACHE_MAX_CARDS = int(os.getenv("CARD_CACHE_MAX_CARDS", "8192"))
+
+# Cards fetched (with their nested rows) per round trip when streaming an export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "100"))
+
+# Batch import limits: items accepted per request and cards per multi-row insert
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_INSERT_CHUNK_SIZE = int(os.getenv("BATCH_INSERT_CHUNK_SIZE", "100"))
+
+# Delta sync: how far sync cursors stay behind the present (to cover clock
+# skew between workers and writes still in flight) and how long tombstones of
+# deleted cards are kept
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "2"))
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Server-Sent Events push of card changes: events buffered per open stream
+# before a slow client is told to resync, streams per user per worker,
+# heartbeat interval and maximum stream lifetime (clients reconnect)
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_MAX_STREAMS_PER_USER = int(os.getenv("SSE_MAX_STREAMS_PER_USER", "5"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_STREAM_SECONDS = float(os.getenv("SSE_MAX_STREAM_SECONDS", "3600"))
+
+# Negotiated response encodings: bodies smaller than this are sent
+# uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Startup warm-up: storage connections to pre-open (and bcrypt workers to
+# spawn) before the worker reports ready; 0 disables it
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "0"))
+READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+
+def validate_config():
+    """Raise ValueError for settings the app cannot run without.
+
+    Called from the app lifespan rather than at import time, so modules can be
+    imported (by tests, scripts, the import profiler) without real credentials.
+    """
+    if STORAGE_BACKEND not in ("supabase", "sqlite"):
+        raise ValueError("STORAGE_BACKEND must be 'supabase' or 'sqlite'")
+    if not JWT_SECRET:
+        raise ValueError("JWT_SECRET must be set in environment variables")
+    if STORAGE_BACKEND == "supabase" and (not PROJECT_URL or not SUPABASE_ANON_KEY or not SUPABASE_URL):
+        raise ValueError("Missing SUPABASE_URL, PROJECT_URL, or SUPABASE_ANON_KEY in .env file")
@@ -0,0 +1,59 @@
+"""Per-card versions and tombstones behind ``GET /travel-cards/changes``.
+
+Every write to a card (its own fields or its hotels and transports) stamps
+``travel_cards.version`` with a fresh value from ``next_version``, and a
+delete leaves a row in ``travel_card_tombstones`` carrying the version it
+happened at. A client that remembers the last version it saw can then ask
+for just the cards and tombstones past it.
+
+Versions are microseconds since the epoch, strictly increasing within a
+worker. Workers' clocks and in-flight writes can put a version slightly in
+the past, so sync cursors stay ``SYNC_SETTLE_SECONDS`` behind the present
+and recent changes may be delivered twice.
+
+On Supabase the column and table come from ``migrations/0003_card_sync.sql``,
+which also gives cards from before versions existed a real one; the SQLite
+schema does the same on connect.
+"""
+import time
+from config import SYNC_TOMBSTONE_RETENTION_DAYS
+from db.storage import get_client, RETURN_MINIMAL
+from utils.pagination import quote_filter_value
+
+TOMBSTONE_COLUMNS = "id,version"
+
+_last_version = 0
+
+def next_version() -> int:
+    global _last_version
+    _last_version = max(_last_version + 1, time.time_ns() // 1000)
+    return _last_version
+
+def version_at(seconds_ago: float) -> int:
+    """The version a write made ``seconds_ago`` would have carried."""
+    return int((time.time() - seconds_ago) * 1_000_000)
+
+def oldest_syncable_version() -> int:
+    # Cursors older than this may have missed tombstones that were pruned
+    return version_at(SYNC_TOMBSTONE_RETENTION_DAYS * 86400)
+
+def after_filter(after: tuple) -> str:
+    """PostgREST or-filter for rows past the (version, id) keyset position."""
+    version, row_id = after
+    return f"version.gt.{int(version)},and(version.eq.{int(version)},id.gt.{quote_filter_value(row_id)})"
+
+async def write_tombstone(user_id: str, card_id: str, version: int):
+    await get_client().table("travel_card_tombstones").upsert(
+        {"id": card_id, "user_id": user_id, "version": version}, on_conflict="id", returning=RETURN_MINIMAL
+    ).execute()
+
+async def clear_tombstone(card_id: str):
+    await get_client().table("travel_card_tombstones").delete(returning=RETURN_MINIMAL).eq("id", card_id).execute()
+
+async def prune_tombstones(user_id: str):
+    await get_client().table("travel_card_tombstones").delete(returning=RETURN_MINIMAL).eq("user_id", user_id).lt("version", oldest_syncable_version()).execute()
+
+async def get_tombstones(user_id: str, after: tuple, limit: int) -> list:
+    query = get_client().table("travel_card_tombstones").select(TOMBSTONE_COLUMNS).eq("user_id", user_id).or_(after_filter(after))
+    response = await query.order("version").order("id").limit(limit).execute()
+    return response.data if response.data else []
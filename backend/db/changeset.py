@@ -0,0 +1,82 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+@dataclass
+class Changeset:
+    inserts: list = field(default_factory=list)
+    updates: list = field(default_factory=list)
+    deletes: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+    # For each incoming row, where its final state comes from:
+    # ("unchanged", row), ("update", index) or ("insert", index)
+    sources: list = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.deletes)
+
+def _differs(existing: dict, incoming: dict, columns: tuple) -> bool:
+    return any(existing.get(column) != incoming.get(column) for column in columns)
+
+def _content(row: dict, columns: tuple) -> tuple:
+    return tuple(row.get(column) for column in columns)
+
+def compute_changeset(existing_rows: list, incoming_rows: list, columns: tuple) -> Changeset:
+    """Diff incoming rows against the current rows of one card.
+
+    Incoming rows carrying the id of an existing row are compared with it and
+    become updates only if a column changed. Rows without a known id are matched
+    by content against the remaining existing rows, so resubmitting an unchanged
+    itinerary costs nothing. Whatever is left over is inserted or deleted.
+    """
+    changeset = Changeset()
+    existing_by_id = {row["id"]: row for row in existing_rows}
+    claimed = set()
+    sources = [None] * len(incoming_rows)
+
+    # Match by id first so content matching can't steal a row that was addressed explicitly
+    for i, row in enumerate(incoming_rows):
+        current = existing_by_id.get(row.get("id"))
+        if current is None or current["id"] in claimed:
+            continue
+        claimed.add(current["id"])
+        if _differs(current, row, columns):
+            sources[i] = ("update", len(changeset.updates))
+            changeset.updates.append({**{c: row.get(c) for c in columns}, "id": current["id"]})
+        else:
+            sources[i] = ("unchanged", current)
+            changeset.unchanged.append(current)
+
+    # Identical existing rows queue up under the same key and are claimed in order
+    unclaimed_by_content = {}
+    for row in existing_rows:
+        if row["id"] not in claimed:
+            unclaimed_by_content.setdefault(_content(row, columns), deque()).append(row)
+
+    for i, row in enumerate(incoming_rows):
+        if sources[i] is not None:
+            continue
+        matches = unclaimed_by_content.get(_content(row, columns))
+        if matches:
+            match = matches.popleft()
+            claimed.add(match["id"])
+            sources[i] = ("unchanged", match)
+            changeset.unchanged.append(match)
+        else:
+            sources[i] = ("insert", len(changeset.inserts))
+            changeset.inserts.append({c: row.get(c) for c in columns})
+
+    changeset.deletes = [row["id"] for row in existing_rows if row["id"] not in claimed]
+    changeset.sources = sources
+    return changeset
+
+def resolve_rows(changeset: Changeset, updated_rows: list, inserted_rows: list) -> list:
+    """Final rows in request order once the changeset has been written."""
+    rows = []
+    for kind, ref in changeset.sources:
+        if kind == "unchanged":
+            rows.append(ref)
+        elif kind == "update":
+            rows.append(updated_rows[ref])
+        else:
+            rows.append(inserted_rows[ref])
+    return rows
@@ -0,0 +1,162 @@
+"""Per-user interval indexes of trip dates and hotel stays, for conflict checks.
+
+Indexes are built from the database on first use, cached per worker, and
+kept current by the card service on every write, so conflict queries never
+rescan a user's cards. Trips are closed date ranges; hotel stays are
+half-open (check-out day is free for the next check-in).
+"""
+from config import CARD_CACHE_TTL_SECONDS, CARD_CACHE_MAX_USERS
+from db.storage import get_client, fetch_all
+from utils.cache import TTLCache
+from utils.intervals import IntervalIndex
+
+class UserIntervals:
+    def __init__(self):
+        self.trips = IntervalIndex(closed=True)
+        self.stays = IntervalIndex(closed=False)
+        self._stays_by_card = {}
+
+    def put_trip(self, card: dict):
+        self.trips.add(card["id"], card["start_date"], card["end_date"], {
+            "card_id": card["id"],
+            "label": card.get("destination"),
+        })
+
+    def put_stays(self, card_id: str, hotels: list):
+        for hotel_id in self._stays_by_card.pop(card_id, ()):
+            self.stays.remove(hotel_id)
+        self._stays_by_card[card_id] = []
+        for hotel in hotels:
+            self.put_stay(card_id, hotel)
+
+    def put_stay(self, card_id: str, hotel: dict):
+        self.remove_stay(card_id, hotel["id"])
+        # Stays without both dates can't conflict with anything
+        if hotel.get("check_in_date") and hotel.get("check_out_date"):
+            self.stays.add(hotel["id"], hotel["check_in_date"], hotel["check_out_date"], {
+                "card_id": card_id,
+                "hotel_id": hotel["id"],
+                "label": hotel.get("hotel_name"),
+            })
+            self._stays_by_card.setdefault(card_id, []).append(hotel["id"])
+
+    def remove_stay(self, card_id: str, hotel_id: str):
+        self.stays.remove(hotel_id)
+        stays = self._stays_by_card.get(card_id)
+        if stays and hotel_id in stays:
+            stays.remove(hotel_id)
+
+    def stay_ids(self, card_id: str) -> set:
+        return set(self._stays_by_card.get(card_id, ()))
+
+    def remove_card(self, card_id: str):
+        self.trips.remove(card_id)
+        self.put_stays(card_id, [])
+
+    def conflicts(self) -> tuple:
+        """All current (trip overlaps, stay overlaps), shaped like ``find_card_conflicts``."""
+        return tuple(
+            [(first[1], second[1], start, end) for first, second, start, end in index.conflicts()]
+            for index in (self.trips, self.stays)
+        )
+
+def find_card_conflicts(intervals: UserIntervals, card: dict, hotels: list = None) -> tuple:
+    """Conflicts a card would have if written: (trip overlaps, stay overlaps).
+
+    ``card`` needs start_date/end_date (and id when it already exists, so it
+    isn't compared with itself). ``hotels``, when given, replace the card's
+    current stays; new ones without an id are compared by position. Each
+    overlap is (existing value, candidate value, overlap start, overlap end).
+    """
+    card_id = card.get("id")
+    candidate = {"card_id": card_id, "label": card.get("destination")}
+    trip_conflicts = []
+    for key, existing in intervals.trips.overlapping(card["start_date"], card["end_date"], exclude={card_id}):
+        start, end = intervals.trips.entry(key)
+        trip_conflicts.append((existing, candidate, max(card["start_date"], start), min(card["end_date"], end)))
+
+    stay_conflicts = []
+    if hotels:
+        replaced = intervals.stay_ids(card_id) if card_id else set()
+        incoming = IntervalIndex(closed=False)
+        for i, hotel in enumerate(hotels):
+            if not (hotel.get("check_in_date") and hotel.get("check_out_date")):
+                continue
+            check_in, check_out = hotel["check_in_date"], hotel["check_out_date"]
+            value = {"card_id": card_id, "hotel_id": hotel.get("id"), "label": hotel.get("hotel_name")}
+            incoming.add(hotel.get("id") or f"new:{i}", check_in, check_out, value)
+            for key, existing in intervals.stays.overlapping(check_in, check_out, exclude=replaced):
+                start, end = intervals.stays.entry(key)
+                stay_conflicts.append((existing, value, max(check_in, start), min(check_out, end)))
+        # Stays within the same request can clash with each other too
+        stay_conflicts.extend((a[1], b[1], start, end) for a, b, start, end in incoming.conflicts())
+    return trip_conflicts, stay_conflicts
+
+_indexes = TTLCache(maxsize=CARD_CACHE_MAX_USERS, ttl=CARD_CACHE_TTL_SECONDS)
+
+async def _load(user_id: str) -> UserIntervals:
+    # Imported here: the card service keeps these indexes current on its writes
+    from db import travel_card_service
+
+    cards = await fetch_all(lambda: get_client().table("travel_cards").select("id,destination,start_date,end_date").eq("user_id", user_id).order("id"))
+    hotels = await travel_card_service._fetch_by_card_ids("hotels", [card["id"] for card in cards], "id,travel_card_id,hotel_name,check_in_date,check_out_date")
+
+    intervals = UserIntervals()
+    hotels_by_card = {}
+    for hotel in hotels:
+        hotels_by_card.setdefault(hotel["travel_card_id"], []).append(hotel)
+    for card in cards:
+        intervals.put_trip(card)
+        intervals.put_stays(card["id"], hotels_by_card.get(card["id"], []))
+    return intervals
+
+async def get_user_intervals(user_id: str):
+    intervals = _indexes.get(user_id)
+    if intervals is not None:
+        return intervals
+    try:
+        version = _indexes.version(user_id)
+        intervals = await _load(user_id)
+    except Exception as e:
+        print(f"Error loading conflict index: {e}")
+        return None
+    # Dropped if a write landed while loading; the next call reloads
+    _indexes.set(user_id, intervals, version)
+    return intervals
+
+def card_written(user_id: str, card: dict, hotels: list = None):
+    """Reflect a created/updated card; ``hotels`` is None when they didn't change."""
+    intervals = _indexes.get(user_id)
+    if intervals is None:
+        # Not indexed here; make any in-flight load discard its snapshot
+        _indexes.invalidate(user_id)
+        return
+    intervals.put_trip(card)
+    if hotels is not None:
+        intervals.put_stays(card["id"], hotels)
+
+def card_deleted(user_id: str, card_id: str):
+    intervals = _indexes.get(user_id)
+    if intervals is None:
+        _indexes.invalidate(user_id)
+        return
+    intervals.remove_card(card_id)
+
+def stay_written(user_id: str, card_id: str, hotel: dict):
+    """Reflect one created/updated hotel without touching the card's other stays."""
+    intervals = _indexes.get(user_id)
+    if intervals is None:
+        _indexes.invalidate(user_id)
+        return
+    intervals.put_stay(card_id, hotel)
+
+def stay_deleted(user_id: str, card_id: str, hotel_id: str):
+    intervals = _indexes.get(user_id)
+    if intervals is None:
+        _indexes.invalidate(user_id)
+        return
+    intervals.remove_stay(card_id, hotel_id)
+
+def forget_user(user_id: str):
+    # After a write that may have partly landed; rebuilt on next use
+    _indexes.invalidate(user_id)
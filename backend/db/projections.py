@@ -0,0 +1,24 @@
+"""Select lists derived from the response models.
+
+Queries ask for exactly the columns the API returns instead of ``*``, so
+columns added to the tables later don't silently inflate every payload.
+"""
+from models.auth import CurrentUser
+from models.travel_card import TravelCardResponse, HotelResponse, TransportResponse
+
+def columns_for(model, exclude: tuple = (), rename: dict = None, extra: tuple = ()) -> str:
+    """Comma-separated column list for a model's fields.
+
+    ``rename`` maps model field names to column names where they differ.
+    """
+    rename = rename or {}
+    columns = [rename.get(name, name) for name in model.model_fields if name not in exclude]
+    columns.extend(c for c in extra if c not in columns)
+    return ",".join(columns)
+
+CARD_COLUMNS = columns_for(TravelCardResponse, exclude=("hotels", "transports"))
+HOTEL_COLUMNS = columns_for(HotelResponse)
+TRANSPORT_COLUMNS = columns_for(TransportResponse)
+USER_COLUMNS = columns_for(CurrentUser, rename={"user_id": "id"})
+# Login additionally needs the hash to verify against
+USER_AUTH_COLUMNS = columns_for(CurrentUser, rename={"user_id": "id"}, extra=("password_hash",))
@@ -0,0 +1,39 @@
+"""Per-query payload and timing accounting, keyed by "<METHOD> <table>".
+
+Totals are kept process-wide and, while a request is being served, also for
+that request alone (see ``track_request``).
+"""
+import json
+from contextvars import ContextVar
+
+_stats = {}
+_request_totals = ContextVar("request_query_totals", default=None)
+
+def record_query(method: str, table: str, nbytes: int, seconds: float = 0.0):
+    stats = _stats.setdefault(f"{method} {table}", {"count": 0, "bytes": 0, "max_bytes": 0, "seconds": 0.0})
+    stats["count"] += 1
+    stats["bytes"] += nbytes
+    stats["max_bytes"] = max(stats["max_bytes"], nbytes)
+    stats["seconds"] += seconds
+
+    totals = _request_totals.get()
+    if totals is not None:
+        totals["count"] += 1
+        totals["bytes"] += nbytes
+        totals["seconds"] += seconds
+
+def track_request() -> dict:
+    """Start per-request totals in the current context and return them.
+
+    The dict is shared with tasks spawned from this context (gather, to_thread),
+    so queries they run are counted too.
+    """
+    totals = {"count": 0, "bytes": 0, "seconds": 0.0}
+    _request_totals.set(totals)
+    return totals
+
+def payload_size(data) -> int:
+    return len(json.dumps(data, separators=(",", ":"), default=str).encode())
+
+def get_query_stats() -> dict:
+    return {key: dict(stats) for key, stats in _stats.items()}
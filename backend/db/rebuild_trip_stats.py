@@ -0,0 +1,34 @@
+"""Recompute the trip_stats aggregates from the cards themselves.
+
+Run from backend/: python -m db.rebuild_trip_stats [--user USER_ID ...]
+(all users when no --user is given).
+"""
+import argparse
+import asyncio
+from config import validate_config
+from db.storage import init_storage, close_storage
+from db.trip_stats_service import rebuild_trip_stats
+from db.user_service import get_all_user_ids
+
+async def rebuild(user_ids: list):
+    validate_config()
+    await init_storage()
+    try:
+        for user_id in user_ids or await get_all_user_ids():
+            try:
+                trips, rows = await rebuild_trip_stats(user_id)
+            except Exception as e:
+                print(f"Error rebuilding trip stats for user {user_id}: {e}; skipped")
+                continue
+            print(f"Rebuilt trip stats for user {user_id}: {trips} trips, {rows} rows")
+    finally:
+        await close_storage()
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute trip_stats from scratch")
+    parser.add_argument("--user", action="append", dest="users", help="only this user id (repeatable)")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.users))
+
+if __name__ == "__main__":
+    main()
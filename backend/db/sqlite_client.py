@@ -0,0 +1,465 @@
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from db.query_stats import record_query, payload_size
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS travel_cards (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    destination TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    duration_days INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_travel_cards_user_id ON travel_cards(user_id);
+CREATE INDEX IF NOT EXISTS idx_travel_cards_user_start_date ON travel_cards(user_id, start_date, id);
+CREATE INDEX IF NOT EXISTS idx_travel_cards_user_version ON travel_cards(user_id, version, id);
+-- Cards from before versions existed sit at 0, where a sync cursor would look
+-- older than any tombstone; stamp them with the current time instead
+UPDATE travel_cards SET version = CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER) WHERE version = 0;
+
+CREATE TABLE IF NOT EXISTS travel_card_tombstones (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_travel_card_tombstones_user_version ON travel_card_tombstones(user_id, version, id);
+
+CREATE TABLE IF NOT EXISTS hotels (
+    id TEXT PRIMARY KEY,
+    travel_card_id TEXT NOT NULL REFERENCES travel_cards(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    hotel_name TEXT,
+    location TEXT,
+    check_in_date TEXT,
+    check_out_date TEXT,
+    room_type TEXT,
+    price_per_night REAL,
+    total_cost REAL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_hotels_travel_card_id ON hotels(travel_card_id);
+
+CREATE TABLE IF NOT EXISTS transports (
+    id TEXT PRIMARY KEY,
+    travel_card_id TEXT NOT NULL REFERENCES travel_cards(id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    transport_type TEXT,
+    origin TEXT,
+    destination TEXT,
+    departure_time TEXT,
+    arrival_time TEXT,
+    booking_reference TEXT,
+    cost REAL,
+    is_departure INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_transports_travel_card_id ON transports(travel_card_id);
+
+-- Hotels and transports carry their card's owner, so single-row writes can
+-- be ownership-checked by filtering on user_id. These keep that copy honest
+-- (on Supabase a composite foreign key does the same).
+CREATE TRIGGER IF NOT EXISTS hotels_card_owner_insert BEFORE INSERT ON hotels
+WHEN NOT EXISTS (SELECT 1 FROM travel_cards WHERE id = NEW.travel_card_id AND user_id = NEW.user_id)
+BEGIN SELECT RAISE(ABORT, 'travel card not found'); END;
+CREATE TRIGGER IF NOT EXISTS hotels_card_owner_update BEFORE UPDATE OF travel_card_id, user_id ON hotels
+WHEN NOT EXISTS (SELECT 1 FROM travel_cards WHERE id = NEW.travel_card_id AND user_id = NEW.user_id)
+BEGIN SELECT RAISE(ABORT, 'travel card not found'); END;
+CREATE TRIGGER IF NOT EXISTS transports_card_owner_insert BEFORE INSERT ON transports
+WHEN NOT EXISTS (SELECT 1 FROM travel_cards WHERE id = NEW.travel_card_id AND user_id = NEW.user_id)
+BEGIN SELECT RAISE(ABORT, 'travel card not found'); END;
+CREATE TRIGGER IF NOT EXISTS transports_card_owner_update BEFORE UPDATE OF travel_card_id, user_id ON transports
+WHEN NOT EXISTS (SELECT 1 FROM travel_cards WHERE id = NEW.travel_card_id AND user_id = NEW.user_id)
+BEGIN SELECT RAISE(ABORT, 'travel card not found'); END;
+
+CREATE TABLE IF NOT EXISTS trip_stats (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    bucket TEXT NOT NULL,
+    trip_count INTEGER NOT NULL DEFAULT 0,
+    hotel_cost REAL NOT NULL DEFAULT 0,
+    transport_cost REAL NOT NULL DEFAULT 0,
+    status TEXT,
+    month TEXT,
+    UNIQUE (user_id, bucket)
+);
+"""
+
+# Columns added to a table after it first shipped, with the statement that
+# fills them in; older database files get them on connect, before SCHEMA
+# creates indexes and triggers over them
+ADDED_COLUMNS = {
+    "travel_cards": {"version": ("INTEGER NOT NULL DEFAULT 0", None)},
+    "hotels": {"user_id": (
+        "TEXT REFERENCES users(id) ON DELETE CASCADE",
+        "UPDATE hotels SET user_id = (SELECT user_id FROM travel_cards WHERE travel_cards.id = hotels.travel_card_id)",
+    )},
+    "transports": {"user_id": (
+        "TEXT REFERENCES users(id) ON DELETE CASCADE",
+        "UPDATE transports SET user_id = (SELECT user_id FROM travel_cards WHERE travel_cards.id = transports.travel_card_id)",
+    )},
+}
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if not existing:
+            # New database; SCHEMA creates the table with every column
+            continue
+        for column, (definition, backfill) in columns.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                if backfill:
+                    conn.execute(backfill)
+
+# SQLite has no boolean type; these are converted back on read
+BOOLEAN_COLUMNS = {
+    "transports": {"is_departure"},
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+}
+
+def _identifier(name: str) -> str:
+    name = name.strip()
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return name
+
+def _adapt(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _parse_literal(value: str):
+    # Values inside or_() filter strings arrive as PostgREST text
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', value[1:-1])
+    return {"true": 1, "false": 0, "null": None}.get(value, value)
+
+def _split_top_level(expression: str) -> list:
+    parts, depth, quoted, escaped, current = [], 0, False, False, ""
+    for char in expression:
+        if escaped:
+            escaped = False
+        elif quoted and char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+@dataclass
+class SQLiteResponse:
+    data: list
+    count: int = None
+
+class SQLiteQuery:
+    """Subset of the postgrest-py request builder, executed against SQLite."""
+
+    def __init__(self, client: "SQLiteClient", table: str):
+        self._client = client
+        self._table = _identifier(table)
+        self._operation = "select"
+        self._columns = "*"
+        self._values = None
+        self._on_conflict = ("id",)
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+        self._count = None
+        self._head = False
+        self._returning = "representation"
+
+    # Operations
+
+    def select(self, *columns, count: str = None, head: bool = None):
+        self._operation = "select"
+        requested = ",".join(columns) if columns else "*"
+        if requested.strip() != "*":
+            self._columns = ", ".join(_identifier(c) for c in requested.split(","))
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def insert(self, json, count: str = None, upsert: bool = False, returning: str = "representation", **kwargs):
+        self._operation = "upsert" if upsert else "insert"
+        self._values = json if isinstance(json, list) else [json]
+        self._returning = returning
+        return self
+
+    def upsert(self, json, on_conflict: str = "", returning: str = "representation", **kwargs):
+        self._operation = "upsert"
+        self._values = json if isinstance(json, list) else [json]
+        self._returning = returning
+        if on_conflict:
+            self._on_conflict = tuple(_identifier(c) for c in on_conflict.split(","))
+        return self
+
+    def update(self, json: dict, returning: str = "representation", **kwargs):
+        self._operation = "update"
+        self._values = json
+        self._returning = returning
+        return self
+
+    def delete(self, returning: str = "representation", **kwargs):
+        self._operation = "delete"
+        self._returning = returning
+        return self
+
+    # Filters
+
+    def _compare(self, column: str, operator: str, value):
+        self._where.append(f"{_identifier(column)} {operator} ?")
+        self._params.append(_adapt(value))
+        return self
+
+    def eq(self, column: str, value):
+        return self._compare(column, "=", value)
+
+    def neq(self, column: str, value):
+        return self._compare(column, "!=", value)
+
+    def gt(self, column: str, value):
+        return self._compare(column, ">", value)
+
+    def gte(self, column: str, value):
+        return self._compare(column, ">=", value)
+
+    def lt(self, column: str, value):
+        return self._compare(column, "<", value)
+
+    def lte(self, column: str, value):
+        return self._compare(column, "<=", value)
+
+    def like(self, column: str, pattern: str):
+        self._where.append(f"{_identifier(column)} LIKE ? ESCAPE '\\'")
+        self._params.append(pattern.replace("*", "%"))
+        return self
+
+    def ilike(self, column: str, pattern: str):
+        self._where.append(f"LOWER({_identifier(column)}) LIKE LOWER(?) ESCAPE '\\'")
+        self._params.append(pattern.replace("*", "%"))
+        return self
+
+    def is_(self, column: str, value):
+        if value is None or value == "null":
+            self._where.append(f"{_identifier(column)} IS NULL")
+            return self
+        return self._compare(column, "IS", value)
+
+    def in_(self, column: str, values):
+        values = [_adapt(v) for v in values]
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_identifier(column)} IN ({', '.join('?' for _ in values)})")
+        self._params.extend(values)
+        return self
+
+    def or_(self, filters: str, reference_table: str = None):
+        clause, params = self._logic_tree(filters, "OR")
+        # Parenthesized, or the OR would escape the filters it is ANDed with
+        self._where.append(f"({clause})")
+        self._params.extend(params)
+        return self
+
+    def _logic_tree(self, expression: str, joiner: str):
+        clauses, params = [], []
+        for part in _split_top_level(expression):
+            part = part.strip()
+            for keyword in ("and", "or"):
+                if part.startswith(f"{keyword}(") and part.endswith(")"):
+                    clause, nested = self._logic_tree(part[len(keyword) + 1:-1], keyword.upper())
+                    break
+            else:
+                column, operator, value = part.split(".", 2)
+                column = _identifier(column)
+                if operator == "in":
+                    values = [_parse_literal(v) for v in _split_top_level(value.strip("()"))]
+                    clause = f"{column} IN ({', '.join('?' for _ in values)})"
+                    nested = values
+                elif operator == "is":
+                    clause, nested = f"{column} IS ?", [_parse_literal(value)]
+                else:
+                    clause, nested = f"{column} {_OPERATORS[operator]} ?", [_parse_literal(value)]
+            clauses.append(f"({clause})")
+            params.extend(nested)
+        return f" {joiner} ".join(clauses), params
+
+    # Modifiers
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: bool = None, **kwargs):
+        direction = "DESC" if desc else "ASC"
+        nulls = "" if nullsfirst is None else (" NULLS FIRST" if nullsfirst else " NULLS LAST")
+        self._order.append(f"{_identifier(column)} {direction}{nulls}")
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = int(size)
+        return self
+
+    def offset(self, size: int):
+        self._offset = int(size)
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # Execution
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _run(self, conn: sqlite3.Connection) -> SQLiteResponse:
+        if self._operation == "select":
+            return self._run_select(conn)
+        with conn:
+            if self._operation in ("insert", "upsert"):
+                rows = [self._run_insert(conn, row) for row in self._values]
+            elif self._operation == "update":
+                values = {_identifier(k): _adapt(v) for k, v in self._values.items()}
+                assignments = ", ".join(f"{k} = ?" for k in values)
+                cursor = conn.execute(
+                    f"UPDATE {self._table} SET {assignments}{self._where_sql()} RETURNING *",
+                    [*values.values(), *self._params],
+                )
+                rows = cursor.fetchall()
+            else:
+                cursor = conn.execute(f"DELETE FROM {self._table}{self._where_sql()} RETURNING *", self._params)
+                rows = cursor.fetchall()
+        if self._returning == "minimal":
+            return SQLiteResponse(data=[])
+        return SQLiteResponse(data=[self._to_dict(row) for row in rows])
+
+    def _run_insert(self, conn: sqlite3.Connection, row: dict):
+        values = {_identifier(k): _adapt(v) for k, v in row.items()}
+        generated_id = values.get("id") is None
+        if generated_id:
+            values["id"] = str(uuid.uuid4())
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        sql = f"INSERT INTO {self._table} ({columns}) VALUES ({placeholders})"
+        if self._operation == "upsert":
+            # A conflict on another key keeps the existing row's id, like the column default would
+            assignments = ", ".join(
+                f"{k} = excluded.{k}" for k in values if k not in self._on_conflict and not (generated_id and k == "id")
+            )
+            conflict = ", ".join(self._on_conflict)
+            sql += f" ON CONFLICT ({conflict}) DO UPDATE SET {assignments}" if assignments else f" ON CONFLICT ({conflict}) DO NOTHING"
+        return conn.execute(sql + " RETURNING *", list(values.values())).fetchone()
+
+    def _run_select(self, conn: sqlite3.Connection) -> SQLiteResponse:
+        count = None
+        if self._count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {self._table}{self._where_sql()}", self._params).fetchone()[0]
+        if self._head:
+            return SQLiteResponse(data=[], count=count)
+
+        sql = f"SELECT {self._columns} FROM {self._table}{self._where_sql()}"
+        params = list(self._params)
+        if self._order:
+            sql += f" ORDER BY {', '.join(self._order)}"
+        if self._limit is not None or self._offset is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([self._limit if self._limit is not None else -1, self._offset or 0])
+        rows = conn.execute(sql, params).fetchall()
+        return SQLiteResponse(data=[self._to_dict(row) for row in rows], count=count)
+
+    def _to_dict(self, row: sqlite3.Row) -> dict:
+        data = dict(row)
+        for column in BOOLEAN_COLUMNS.get(self._table, ()):
+            if data.get(column) is not None:
+                data[column] = bool(data[column])
+        return data
+
+    async def execute(self) -> SQLiteResponse:
+        started = time.perf_counter()
+        response = await self._client.run(self._run)
+        elapsed = time.perf_counter() - started
+        # No wire here; count what PostgREST would have serialized
+        method = {"select": "GET", "insert": "POST", "upsert": "POST", "update": "PATCH", "delete": "DELETE"}[self._operation]
+        record_query(method, self._table, payload_size(response.data), elapsed)
+        return response
+
+class SQLiteClient:
+    """Embedded storage backend with the same table() API as the Supabase client."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA case_sensitive_like = ON")
+        _add_missing_columns(conn)
+        conn.executescript(SCHEMA)
+        # executescript leaves us in autocommit; writes open their own transactions
+        conn.isolation_level = ""
+        self._conn = conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _run_locked(self, fn):
+        # One connection shared by the worker; sqlite3 connections are not thread-safe
+        with self._lock:
+            return fn(self._conn)
+
+    async def run(self, fn):
+        return await asyncio.to_thread(self._run_locked, fn)
+
+    async def run_in_thread(self, fn):
+        return await asyncio.to_thread(fn)
+
+    def table(self, table_name: str) -> SQLiteQuery:
+        return SQLiteQuery(self, table_name)
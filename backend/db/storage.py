@@ -0,0 +1,72 @@
+"""Storage backend selection.
+
+Every backend exposes the same PostgREST-style query builder, so the service
+modules only ever do ``get_client().table(name)...execute()``:
+
+- ``supabase``: the hosted Supabase project (default)
+- ``sqlite``: an embedded SQLite database for offline runs and profiling
+"""
+import asyncio
+from config import STORAGE_BACKEND, SQLITE_PATH, POSTGREST_MAX_ROWS
+
+# Same value as postgrest's ReturnMethod.minimal; a plain string keeps the
+# service modules from importing postgrest (and pydantic.v1) at startup
+RETURN_MINIMAL = "minimal"
+
+_client = None
+
+async def init_storage():
+    global _client
+    if _client is not None:
+        return _client
+
+    if STORAGE_BACKEND == "sqlite":
+        from db.sqlite_client import SQLiteClient
+        client = SQLiteClient(SQLITE_PATH)
+        await client.run_in_thread(client.connect)
+        _client = client
+    else:
+        from db.supabase_client import init_supabase
+        _client = await init_supabase()
+    return _client
+
+async def close_storage():
+    global _client
+    if STORAGE_BACKEND == "sqlite":
+        if _client is not None:
+            _client.close()
+    else:
+        from db.supabase_client import close_supabase
+        await close_supabase()
+    _client = None
+
+def get_client():
+    if _client is None:
+        raise RuntimeError("Storage is not initialized; init_storage() runs in the app lifespan")
+    return _client
+
+async def fetch_all(make_query, page_size: int = POSTGREST_MAX_ROWS) -> list:
+    """Every row of a select, read in pages so PostgREST's max-rows can't cut it short.
+
+    ``make_query`` returns a fresh query ordered on a unique key (builders
+    can't be reused across requests). Stops at the first short page, so a
+    result that fits in one page still costs one round trip.
+    """
+    rows = []
+    while True:
+        response = await make_query().range(len(rows), len(rows) + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+async def ping_storage():
+    """Cheapest round trip that proves the backend is reachable and the schema exists."""
+    await get_client().table("users").select("id").limit(1).execute()
+
+async def warm_up_storage(connections: int):
+    # Concurrent pings make the pool open that many keep-alive connections
+    # (SQLite has just the one)
+    if STORAGE_BACKEND == "sqlite":
+        connections = 1
+    await asyncio.gather(*(ping_storage() for _ in range(connections)))
@@ -1,24 +1,62 @@
-from supabase import create_client
-from config import PROJECT_URL, SUPABASE_ANON_KEY
+import time
+import httpx
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from db.query_stats import record_query
+from config import (
+    PROJECT_URL,
+    SUPABASE_ANON_KEY,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    SUPABASE_KEEPALIVE_EXPIRY,
+    SUPABASE_TIMEOUT,
+)
 
-supabase = create_client(PROJECT_URL, SUPABASE_ANON_KEY)
+_http_client: httpx.AsyncClient = None
+_supabase: AsyncClient = None
 
-def get_user_by_email(email: str):
-    response = supabase.table("users").select("*").eq("email", email).execute()
-    if response.data:
-        return response.data[0]
-    return None
+async def _mark_request_start(request: httpx.Request):
+    request.extensions["started_at"] = time.perf_counter()
 
-def create_user(email: str, password_hash: str, full_name: str):
-    response = supabase.table("users").insert({
-        "email": email,
-        "password_hash": password_hash,
-        "full_name": full_name
-    }).execute()
-    return response.data[0] if response.data else None
+async def _record_response(response: httpx.Response):
+    # Count bytes actually received from PostgREST and the full round trip
+    # including the body read, per method and table
+    await response.aread()
+    elapsed = time.perf_counter() - response.request.extensions.get("started_at", time.perf_counter())
+    table = response.request.url.path.rstrip("/").rsplit("/", 1)[-1]
+    record_query(response.request.method, table, len(response.content), elapsed)
 
-def get_user_by_id(user_id: str):
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
-    if response.data:
-        return response.data[0]
-    return None
+async def init_supabase() -> AsyncClient:
+    """Create the shared async client; called once from the app lifespan."""
+    global _http_client, _supabase
+    if _supabase is not None:
+        return _supabase
+
+    # One bounded keep-alive pool shared by every request in this worker
+    _http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=SUPABASE_TIMEOUT,
+        follow_redirects=True,
+        event_hooks={"request": [_mark_request_start], "response": [_record_response]},
+    )
+    _supabase = await acreate_client(
+        PROJECT_URL,
+        SUPABASE_ANON_KEY,
+        options=AsyncClientOptions(httpx_client=_http_client),
+    )
+    return _supabase
+
+async def close_supabase():
+    global _http_client, _supabase
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _supabase = None
+
+def get_supabase() -> AsyncClient:
+    if _supabase is None:
+        raise RuntimeError("Supabase client is not initialized; init_supabase() runs in the app lifespan")
+    return _supabase
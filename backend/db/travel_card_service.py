@@ -1,119 +1,489 @@
+import asyncio
 from datetime import datetime, date
-from db.supabase_client import supabase
+from db.storage import get_client, fetch_all, RETURN_MINIMAL
+from db.unit_of_work import UnitOfWork
+from db.changeset import Changeset, compute_changeset, resolve_rows
+from db.projections import CARD_COLUMNS, HOTEL_COLUMNS, TRANSPORT_COLUMNS
+from db.trip_stats_service import apply_trip_changes, trip_contribution
+from db import conflict_index
+from db import card_sync
+from utils.pagination import quote_filter_value, escape_like
+
+# Max card ids per in_ filter when batch loading nested rows
+IN_FILTER_CHUNK_SIZE = 100
+
+# Columns the card list can be sorted (and keyset-paginated) by
+SORTABLE_CARD_COLUMNS = ("start_date", "end_date", "destination")
+
+class CardModified(Exception):
+    """Raised when a conditional write finds the card at another version than the one checked."""
 
 def calculate_duration(start_date: date, end_date: date) -> int:
     delta = end_date - start_date
     return delta.days + 1
 
-def create_travel_card_with_nested(user_id: str, destination: str, start_date: date, end_date: date, status: str = "planning", hotels: list = None, transports: list = None):
-    duration_days = calculate_duration(start_date, end_date)
-    
+def _hotel_row(travel_card_id: str, hotel: dict) -> dict:
+    return {
+        "travel_card_id": travel_card_id,
+        "hotel_name": hotel.get("hotel_name"),
+        "location": hotel.get("location"),
+        "check_in_date": hotel.get("check_in_date").isoformat() if hotel.get("check_in_date") else None,
+        "check_out_date": hotel.get("check_out_date").isoformat() if hotel.get("check_out_date") else None,
+        "room_type": hotel.get("room_type"),
+        "price_per_night": hotel.get("price_per_night"),
+        "total_cost": hotel.get("total_cost"),
+    }
+
+def _transport_row(travel_card_id: str, transport: dict) -> dict:
+    return {
+        "travel_card_id": travel_card_id,
+        "transport_type": transport.get("transport_type"),
+        "origin": transport.get("origin"),
+        "destination": transport.get("destination"),
+        "departure_time": transport.get("departure_time"),
+        "arrival_time": transport.get("arrival_time"),
+        "booking_reference": transport.get("booking_reference"),
+        "cost": transport.get("cost"),
+        "is_departure": transport.get("is_departure", False),
+    }
+
+HOTEL_FIELDS = tuple(_hotel_row("", {}))
+TRANSPORT_FIELDS = tuple(_transport_row("", {}))
+
+def _owned(rows: list, user_id: str) -> list:
+    # Nested rows carry their card's owner so single-row writes can filter on it
+    return [{**row, "user_id": user_id} for row in rows]
+
+async def _insert_rows(table: str, rows: list, user_id: str) -> list:
+    # One multi-row insert per table; PostgREST runs it as a single statement
+    if not rows:
+        return []
+    response = await get_client().table(table).insert(_owned(rows, user_id)).execute()
+    return response.data if response.data else []
+
+async def _rollback_cards(travel_card_ids: list):
+    try:
+        await asyncio.gather(
+            get_client().table("hotels").delete(returning=RETURN_MINIMAL).in_("travel_card_id", travel_card_ids).execute(),
+            get_client().table("transports").delete(returning=RETURN_MINIMAL).in_("travel_card_id", travel_card_ids).execute(),
+        )
+        await get_client().table("travel_cards").delete(returning=RETURN_MINIMAL).in_("id", travel_card_ids).execute()
+    except Exception as e:
+        print(f"Error rolling back travel cards {travel_card_ids}: {e}")
+
+def _card_row(user_id: str, card: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "destination": card["destination"],
+        "start_date": card["start_date"].isoformat(),
+        "end_date": card["end_date"].isoformat(),
+        "duration_days": calculate_duration(card["start_date"], card["end_date"]),
+        "status": card.get("status") or "planning",
+        "version": card_sync.next_version(),
+    }
+
+async def create_travel_card_with_nested(user_id: str, destination: str, start_date: date, end_date: date, status: str = "planning", hotels: list = None, transports: list = None):
     try:
         # Create travel card
-        card_response = supabase.table("travel_cards").insert({
-            "user_id": user_id,
+        card_response = await get_client().table("travel_cards").insert(_card_row(user_id, {
             "destination": destination,
-            "start_date": start_date.isoformat(),
-            "end_date": end_date.isoformat(),
-            "duration_days": duration_days,
-            "status": status
-        }).execute()
+            "start_date": start_date,
+            "end_date": end_date,
+            "status": status,
+        })).execute()
         
         if not card_response.data:
             return None
         
         travel_card = card_response.data[0]
         travel_card_id = travel_card["id"]
-        
-        # Add hotels if provided
-        if hotels:
-            for hotel in hotels:
-                supabase.table("hotels").insert({
-                    "travel_card_id": travel_card_id,
-                    "hotel_name": hotel.get("hotel_name"),
-                    "location": hotel.get("location"),
-                    "check_in_date": hotel.get("check_in_date").isoformat() if hotel.get("check_in_date") else None,
-                    "check_out_date": hotel.get("check_out_date").isoformat() if hotel.get("check_out_date") else None,
-                    "room_type": hotel.get("room_type"),
-                    "price_per_night": hotel.get("price_per_night"),
-                    "total_cost": hotel.get("total_cost"),
-                }).execute()
-        
-        # Add transports if provided
-        if transports:
-            for transport in transports:
-                supabase.table("transports").insert({
-                    "travel_card_id": travel_card_id,
-                    "transport_type": transport.get("transport_type"),
-                    "origin": transport.get("origin"),
-                    "destination": transport.get("destination"),
-                    "departure_time": transport.get("departure_time"),
-                    "arrival_time": transport.get("arrival_time"),
-                    "booking_reference": transport.get("booking_reference"),
-                    "cost": transport.get("cost"),
-                    "is_departure": transport.get("is_departure", False),
-                }).execute()
-        
-        return travel_card
-        
     except Exception as e:
         print(f"Error creating travel card: {e}")
         return None
+    
+    # Add hotels and transports with one insert per table, keeping the
+    # returned rows so callers don't need to read them back. Both inserts are
+    # awaited to completion before any rollback so nothing lands afterwards.
+    hotel_rows, transport_rows = await asyncio.gather(
+        _insert_rows("hotels", [_hotel_row(travel_card_id, h) for h in hotels or []], user_id),
+        _insert_rows("transports", [_transport_row(travel_card_id, t) for t in transports or []], user_id),
+        return_exceptions=True,
+    )
+    for result in (hotel_rows, transport_rows):
+        if isinstance(result, Exception):
+            print(f"Error creating nested rows for travel card: {result}")
+            # Don't leave a half-written card behind
+            await _rollback_cards([travel_card_id])
+            return None
+    
+    travel_card["hotels"] = hotel_rows
+    travel_card["transports"] = transport_rows
+    await apply_trip_changes(user_id, {travel_card_id: trip_contribution(travel_card, hotel_rows, transport_rows)}, created=True)
+    conflict_index.card_written(user_id, travel_card, hotel_rows)
+    return travel_card
+
+async def _create_card_chunk(user_id: str, cards: list) -> list:
+    card_response = await get_client().table("travel_cards").insert([_card_row(user_id, card) for card in cards]).execute()
+    created = card_response.data or []
+    if len(created) != len(cards):
+        if created:
+            await _rollback_cards([row["id"] for row in created])
+        raise RuntimeError(f"Expected {len(cards)} inserted travel cards, got {len(created)}")
+    
+    # Rows come back in insertion order, which ties each card to its input
+    hotel_rows, transport_rows = await asyncio.gather(
+        _insert_rows("hotels", [_hotel_row(row["id"], h) for row, card in zip(created, cards) for h in card.get("hotels") or []], user_id),
+        _insert_rows("transports", [_transport_row(row["id"], t) for row, card in zip(created, cards) for t in card.get("transports") or []], user_id),
+        return_exceptions=True,
+    )
+    for result in (hotel_rows, transport_rows):
+        if isinstance(result, Exception):
+            await _rollback_cards([row["id"] for row in created])
+            raise result
+    
+    hotels_by_card = _group_by_card(hotel_rows)
+    transports_by_card = _group_by_card(transport_rows)
+    for row in created:
+        row["hotels"] = hotels_by_card.get(row["id"], [])
+        row["transports"] = transports_by_card.get(row["id"], [])
+    return created
+
+async def create_travel_cards_batch(user_id: str, cards: list, chunk_size: int) -> list:
+    """Create many cards with their nested rows using chunked multi-row inserts.
 
-def get_travel_cards_by_user(user_id: str):
+    ``cards`` are dicts shaped like ``TravelCardCreateRequest``. Returns a list
+    aligned with ``cards`` holding each created card, or None where it failed.
+    A chunk that fails as a whole is rolled back and retried card by card, so
+    one bad item doesn't take the rest of its chunk down with it.
+    """
+    results = []
+    for i in range(0, len(cards), chunk_size):
+        chunk = cards[i:i + chunk_size]
+        try:
+            created = await _create_card_chunk(user_id, chunk)
+        except Exception as e:
+            print(f"Error creating travel card batch, retrying one by one: {e}")
+            for card in chunk:
+                results.append(await create_travel_card_with_nested(
+                    user_id,
+                    card["destination"],
+                    card["start_date"],
+                    card["end_date"],
+                    card.get("status") or "planning",
+                    card.get("hotels"),
+                    card.get("transports"),
+                ))
+            continue
+        results.extend(created)
+        for row in created:
+            conflict_index.card_written(user_id, row, row["hotels"])
+        await apply_trip_changes(
+            user_id,
+            {row["id"]: trip_contribution(row, row["hotels"], row["transports"]) for row in created},
+            created=True,
+        )
+    return results
+
+async def get_travel_card_by_id(card_id: str, user_id: str, uow: UnitOfWork = None):
+    if uow is not None and uow.has_card(card_id):
+        return uow.get_card(card_id, user_id)
     try:
-        response = supabase.table("travel_cards").select("*").eq("user_id", user_id).execute()
-        return response.data if response.data else []
+        response = await get_client().table("travel_cards").select(CARD_COLUMNS).eq("id", card_id).eq("user_id", user_id).execute()
+        card = response.data[0] if response.data else None
+        if uow is not None:
+            if card:
+                uow.put_card(card)
+            else:
+                uow.mark_missing(card_id)
+        return card
     except Exception as e:
-        print(f"Error fetching travel cards: {e}")
+        print(f"Error fetching travel card: {e}")
         return None
 
-def get_travel_card_by_id(card_id: str, user_id: str):
+async def get_travel_card_version(card_id: str, user_id: str, uow: UnitOfWork = None):
+    """The card's current version, or None if it doesn't exist.
+
+    The card row is read fresh and left in ``uow``, so nested rows loaded
+    after it are at least as new as the version: a write that lands in
+    between bumps the version past the one returned here.
+    """
     try:
-        response = supabase.table("travel_cards").select("*").eq("id", card_id).eq("user_id", user_id).execute()
-        return response.data[0] if response.data else None
+        response = await get_client().table("travel_cards").select(f"{CARD_COLUMNS},version").eq("id", card_id).eq("user_id", user_id).execute()
     except Exception as e:
-        print(f"Error fetching travel card: {e}")
+        print(f"Error fetching travel card version: {e}")
         return None
+    card = response.data[0] if response.data else None
+    if uow is not None:
+        if card:
+            uow.put_card(card)
+        else:
+            uow.mark_missing(card_id)
+    return card["version"] if card else None
 
-def get_hotels_by_card(card_id: str):
+async def travel_card_exists(card_id: str, user_id: str, uow: UnitOfWork = None) -> bool:
+    if uow is not None and uow.has_card(card_id):
+        return uow.get_card(card_id, user_id) is not None
     try:
-        response = supabase.table("hotels").select("*").eq("travel_card_id", card_id).execute()
-        return response.data if response.data else []
+        response = await get_client().table("travel_cards").select("id").eq("id", card_id).eq("user_id", user_id).limit(1).execute()
+        return bool(response.data)
     except Exception as e:
-        print(f"Error fetching hotels: {e}")
-        return None
+        print(f"Error checking travel card: {e}")
+        return False
+
+def _group_by_card(rows: list) -> dict:
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row["travel_card_id"], []).append(row)
+    return grouped
+
+NESTED_COLUMNS = {"hotels": HOTEL_COLUMNS, "transports": TRANSPORT_COLUMNS}
+
+async def _fetch_by_card_ids(table: str, card_ids: list, columns: str = None) -> list:
+    columns = columns or NESTED_COLUMNS[table]
+
+    def chunk_query(chunk: list):
+        return lambda: get_client().table(table).select(columns).in_("travel_card_id", chunk).order("id")
+
+    # Chunk the in_ filter so the PostgREST URL stays bounded for heavy users;
+    # a chunk of cards can still hold more rows than one response, so each is paged
+    chunks = await asyncio.gather(*(
+        fetch_all(chunk_query(card_ids[i:i + IN_FILTER_CHUNK_SIZE]))
+        for i in range(0, len(card_ids), IN_FILTER_CHUNK_SIZE)
+    ))
+    return [row for rows in chunks for row in rows]
+
+async def attach_nested(cards: list) -> list:
+    """Load hotels and transports for many cards in a constant number of queries."""
+    if not cards:
+        return cards
+
+    card_ids = [card["id"] for card in cards]
+    hotels, transports = await asyncio.gather(
+        _fetch_by_card_ids("hotels", card_ids),
+        _fetch_by_card_ids("transports", card_ids),
+    )
+    hotels_by_card = _group_by_card(hotels)
+    transports_by_card = _group_by_card(transports)
+
+    for card in cards:
+        card["hotels"] = hotels_by_card.get(card["id"], [])
+        card["transports"] = transports_by_card.get(card["id"], [])
+    return cards
+
+async def attach_summaries(cards: list) -> list:
+    """Add per-card hotel/transport counts, cost totals and first departure.
+
+    Only the columns needed for the rollups are fetched, in one batched pass
+    per table, so the payload doesn't grow with itinerary depth.
+    """
+    if not cards:
+        return cards
+
+    card_ids = [card["id"] for card in cards]
+    hotels, transports = await asyncio.gather(
+        _fetch_by_card_ids("hotels", card_ids, "travel_card_id,total_cost"),
+        _fetch_by_card_ids("transports", card_ids, "travel_card_id,cost,departure_time"),
+    )
+
+    summaries = {
+        card["id"]: {
+            "hotel_count": 0,
+            "transport_count": 0,
+            "total_hotel_cost": 0,
+            "total_transport_cost": 0,
+            "first_departure": None,
+        }
+        for card in cards
+    }
+    for hotel in hotels:
+        summary = summaries[hotel["travel_card_id"]]
+        summary["hotel_count"] += 1
+        summary["total_hotel_cost"] += hotel.get("total_cost") or 0
+    for transport in transports:
+        summary = summaries[transport["travel_card_id"]]
+        summary["transport_count"] += 1
+        summary["total_transport_cost"] += transport.get("cost") or 0
+        departure = transport.get("departure_time")
+        if departure and (summary["first_departure"] is None or departure < summary["first_departure"]):
+            summary["first_departure"] = departure
 
-def get_transports_by_card(card_id: str):
+    for card in cards:
+        card.update(summaries[card["id"]])
+    return cards
+
+async def get_travel_cards_with_nested(user_id: str, summary: bool = False):
     try:
-        response = supabase.table("transports").select("*").eq("travel_card_id", card_id).execute()
-        return response.data if response.data else []
+        cards = await fetch_all(lambda: get_client().table("travel_cards").select(CARD_COLUMNS).eq("user_id", user_id).order("start_date").order("id"))
+        return await (attach_summaries(cards) if summary else attach_nested(cards))
     except Exception as e:
-        print(f"Error fetching transports: {e}")
+        print(f"Error fetching travel cards with nested data: {e}")
         return None
 
-def update_travel_card(card_id: str, user_id: str, updates: dict):
+def _filtered_cards_query(user_id: str, status: str = None, start_after: date = None, end_before: date = None, destination_prefix: str = None):
+    query = get_client().table("travel_cards").select(CARD_COLUMNS).eq("user_id", user_id)
+    if status is not None:
+        query = query.eq("status", status)
+    if start_after is not None:
+        query = query.gte("start_date", start_after.isoformat())
+    if end_before is not None:
+        query = query.lte("end_date", end_before.isoformat())
+    if destination_prefix:
+        query = query.ilike("destination", escape_like(destination_prefix) + "%")
+    return query
+
+async def get_travel_cards_page(user_id: str, status: str = None, start_after: date = None, end_before: date = None, destination_prefix: str = None, sort: str = "start_date", descending: bool = False, after: tuple = None, limit: int = None, summary: bool = False):
+    """Filtered, keyset-paginated cards with nested data (or rollups if ``summary``).
+
+    ``after`` is the (sort value, id) of the last card on the previous page.
+    Returns (cards, last_key) where last_key is None on the final page.
+    """
+    if sort not in SORTABLE_CARD_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort}")
     try:
-        # Recalculate duration if dates changed
-        if "start_date" in updates and "end_date" in updates:
-            updates["duration_days"] = calculate_duration(updates["start_date"], updates["end_date"])
-        elif "start_date" in updates or "end_date" in updates:
-            card = get_travel_card_by_id(card_id, user_id)
-            if card:
-                start = updates.get("start_date") or card["start_date"]
-                end = updates.get("end_date") or card["end_date"]
-                updates["duration_days"] = calculate_duration(start, end)
+        query = _filtered_cards_query(user_id, status, start_after, end_before, destination_prefix)
+        if after is not None:
+            value, card_id = after
+            op = "lt" if descending else "gt"
+            value, card_id = quote_filter_value(value), quote_filter_value(card_id)
+            query = query.or_(f"{sort}.{op}.{value},and({sort}.eq.{value},id.{op}.{card_id})")
+        query = query.order(sort, desc=descending).order("id", desc=descending)
+        if limit is not None:
+            # One extra row tells us whether another page exists
+            query = query.limit(limit + 1)
+        
+        response = await query.execute()
+        cards = response.data if response.data else []
+        last_key = None
+        if limit is not None and len(cards) > limit:
+            cards = cards[:limit]
+            last_key = (cards[-1][sort], cards[-1]["id"])
+        return await (attach_summaries(cards) if summary else attach_nested(cards)), last_key
+    except Exception as e:
+        print(f"Error fetching travel card page: {e}")
+        return None, None
+
+async def iter_travel_card_pages(user_id: str, chunk_size: int):
+    """Yield all of a user's cards with nested data, ``chunk_size`` cards at a time.
+
+    Pages are fetched one after another by keyset, so only one chunk is held
+    in memory. Raises RuntimeError if a page fails after iteration started.
+    """
+    after = None
+    while True:
+        cards, last_key = await get_travel_cards_page(user_id, after=after, limit=chunk_size)
+        if cards is None:
+            raise RuntimeError("Failed to fetch travel card page")
+        if cards:
+            yield cards
+        if last_key is None:
+            return
+        after = last_key
+
+async def get_travel_card_changes(user_id: str, after: tuple = None, limit: int = 100):
+    """Cards written and deleted past the (version, id) position ``after``.
+
+    Cards and tombstones are merged in (version, id) order and cut at
+    ``limit``. Returns (cards with nested data, deleted card ids, last_key),
+    where last_key is the position of the last item when more remain and
+    None otherwise. Without ``after`` (a first sync) there is nothing to
+    delete on the client, so only live cards are returned.
+    """
+    try:
+        query = get_client().table("travel_cards").select(f"{CARD_COLUMNS},version").eq("user_id", user_id)
+        if after is not None:
+            query = query.or_(card_sync.after_filter(after))
+        
+        async def no_tombstones():
+            return []
         
-        response = supabase.table("travel_cards").update(updates).eq("id", card_id).eq("user_id", user_id).execute()
-        return response.data[0] if response.data else None
+        # One extra row from each side tells us whether another page exists
+        cards_response, tombstones = await asyncio.gather(
+            query.order("version").order("id").limit(limit + 1).execute(),
+            card_sync.get_tombstones(user_id, after, limit + 1) if after is not None else no_tombstones(),
+        )
+        items = sorted(
+            [(card["version"], card["id"], card) for card in cards_response.data or []]
+            + [(tombstone["version"], tombstone["id"], None) for tombstone in tombstones],
+            key=lambda item: item[:2],
+        )
+        last_key = None
+        if len(items) > limit:
+            items = items[:limit]
+            last_key = items[-1][:2]
+        cards = [card for _, _, card in items if card is not None]
+        deleted = [row_id for _, row_id, card in items if card is None]
+        return await attach_nested(cards), deleted, last_key
     except Exception as e:
-        print(f"Error updating travel card: {e}")
+        print(f"Error fetching travel card changes: {e}")
+        return None, None, None
+
+async def _load_nested(table: str, card_id: str, uow: UnitOfWork = None) -> list:
+    if uow is not None and uow.has_nested(table, card_id):
+        return uow.get_nested(table, card_id)
+    rows = await _fetch_by_card_ids(table, [card_id])
+    if uow is not None:
+        uow.put_nested(table, card_id, rows)
+    return rows
+
+async def get_travel_card_with_nested(card_id: str, user_id: str, uow: UnitOfWork = None):
+    try:
+        card = await get_travel_card_by_id(card_id, user_id, uow)
+        if not card:
+            return None
+        card["hotels"], card["transports"] = await asyncio.gather(
+            _load_nested("hotels", card_id, uow),
+            _load_nested("transports", card_id, uow),
+        )
+        return card
+    except Exception as e:
+        print(f"Error fetching travel card with nested data: {e}")
         return None
 
-def update_travel_card_with_nested(card_id: str, user_id: str, destination: str = None, start_date: date = None, end_date: date = None, status: str = None, hotels: list = None, transports: list = None):
+async def _apply_changeset(table: str, card_id: str, user_id: str, changeset: Changeset) -> list:
+    # At most one upsert, one insert and one delete per table; they touch
+    # disjoint rows so they can run concurrently
+    async def upsert():
+        if not changeset.updates:
+            return []
+        response = await get_client().table(table).upsert(_owned(changeset.updates, user_id)).execute()
+        return response.data if response.data else []
+    
+    async def delete():
+        if changeset.deletes:
+            await get_client().table(table).delete(returning=RETURN_MINIMAL).in_("id", changeset.deletes).eq("travel_card_id", card_id).execute()
+    
+    updated_rows, inserted_rows, _ = await asyncio.gather(
+        upsert(),
+        _insert_rows(table, changeset.inserts, user_id),
+        delete(),
+    )
+    return resolve_rows(changeset, updated_rows, inserted_rows)
+
+async def _plan_nested(table: str, card_id: str, incoming_rows: list, uow: UnitOfWork = None):
+    """(changeset, current rows); the changeset is None when the request left ``table`` alone."""
+    existing_rows = await _load_nested(table, card_id, uow)
+    if incoming_rows is None:
+        return None, existing_rows
+    columns = HOTEL_FIELDS if table == "hotels" else TRANSPORT_FIELDS
+    return compute_changeset(existing_rows, incoming_rows, columns), existing_rows
+
+async def _sync_nested(table: str, card_id: str, user_id: str, changeset: Changeset, existing_rows: list) -> list:
+    if changeset is None or changeset.is_empty():
+        return existing_rows
+    return await _apply_changeset(table, card_id, user_id, changeset)
+
+async def update_travel_card_with_nested(card_id: str, user_id: str, destination: str = None, start_date: date = None, end_date: date = None, status: str = None, hotels: list = None, transports: list = None, uow: UnitOfWork = None, expected_version: int = None):
+    """Apply a partial update; returns the card, or None if it is missing or the write failed.
+
+    With ``expected_version`` the card is first moved off that version
+    before anything else is written; CardModified is raised if it was
+    already at another one, or if another write moved it on meanwhile.
+    """
+    if uow is None:
+        uow = UnitOfWork()
     try:
         # Verify card exists and belongs to user
-        card = get_travel_card_by_id(card_id, user_id)
+        card = await get_travel_card_by_id(card_id, user_id, uow)
         if not card:
             return None
         
@@ -130,96 +500,229 @@ def update_travel_card_with_nested(card_id: str, user_id: str, destination: str
         
         # Recalculate duration if dates are being updated
         if start_date is not None or end_date is not None:
-            start = start_date if start_date is not None else card["start_date"]
-            end = end_date if end_date is not None else card["end_date"]
+            start = start_date if start_date is not None else date.fromisoformat(card["start_date"])
+            end = end_date if end_date is not None else date.fromisoformat(card["end_date"])
             card_updates["duration_days"] = calculate_duration(start, end)
         
-        # Update card if there are any updates
-        if card_updates:
-            card_response = supabase.table("travel_cards").update(card_updates).eq("id", card_id).eq("user_id", user_id).execute()
+        # Skip the write when nothing actually changed
+        card_updates = {k: v for k, v in card_updates.items() if card.get(k) != v}
+        
+        # Diff hotels and transports concurrently; collections the request
+        # didn't touch are just loaded since they still belong in the response
+        incoming_hotels = [{**_hotel_row(card_id, h), "id": h.get("id")} for h in hotels] if hotels is not None else None
+        incoming_transports = [{**_transport_row(card_id, t), "id": t.get("id")} for t in transports] if transports is not None else None
+        (hotel_changes, hotel_rows), (transport_changes, transport_rows) = await asyncio.gather(
+            _plan_nested("hotels", card_id, incoming_hotels, uow),
+            _plan_nested("transports", card_id, incoming_transports, uow),
+        )
+        
+        changes = {}
+        if hotel_changes is not None:
+            changes["hotels"] = hotel_changes
+        if transport_changes is not None:
+            changes["transports"] = transport_changes
+        
+        changed = bool(card_updates) or any(not c.is_empty() for c in changes.values())
+        claimed_version = None
+        if changed and expected_version is not None:
+            # Claim the card before writing anything, so of two writers that
+            # checked the same ETag only one gets past this point
+            claimed_version = card_sync.next_version()
+            claim = await get_client().table("travel_cards").update({"version": claimed_version}).eq("id", card_id).eq("user_id", user_id).eq("version", expected_version).execute()
+            if not claim.data:
+                raise CardModified(card_id)
+        
+        hotel_rows, transport_rows = await asyncio.gather(
+            _sync_nested("hotels", card_id, user_id, hotel_changes, hotel_rows),
+            _sync_nested("transports", card_id, user_id, transport_changes, transport_rows),
+        )
+        uow.put_nested("hotels", card_id, hotel_rows)
+        uow.put_nested("transports", card_id, transport_rows)
+        
+        # The card row is written last, with a new version, so a sync that
+        # sees the version also sees the nested rows it covers
+        if changed:
+            card_updates["version"] = card_sync.next_version()
+            query = get_client().table("travel_cards").update(card_updates).eq("id", card_id).eq("user_id", user_id)
+            if claimed_version is not None:
+                query = query.eq("version", claimed_version)
+            card_response = await query.execute()
             if not card_response.data:
+                # Another write moved the card on after the claim
+                if claimed_version is not None:
+                    raise CardModified(card_id)
                 return None
             card = card_response.data[0]
+            uow.put_card(card)
+        card["hotels"] = hotel_rows
+        card["transports"] = transport_rows
+        
+        if "status" in card_updates or "start_date" in card_updates or any(not c.is_empty() for c in changes.values()):
+            await apply_trip_changes(user_id, {card_id: trip_contribution(card, card["hotels"], card["transports"])})
+        conflict_index.card_written(user_id, card, card["hotels"] if hotels is not None else None)
         
-        # Handle hotels if provided
-        if hotels is not None:
-            # Get existing hotel IDs in database
-            existing_hotels = get_hotels_by_card(card_id)
-            existing_hotel_ids = {h["id"] for h in existing_hotels} if existing_hotels else set()
-            
-            # Track hotel IDs from the request
-            request_hotel_ids = set()
-            
-            for hotel in hotels:
-                if "id" in hotel and hotel["id"]:
-                    # Update existing hotel
-                    request_hotel_ids.add(hotel["id"])
-                    hotel_updates = {k: v for k, v in hotel.items() if k != "id"}
-                    supabase.table("hotels").update(hotel_updates).eq("id", hotel["id"]).eq("travel_card_id", card_id).execute()
-                else:
-                    # Create new hotel
-                    supabase.table("hotels").insert({
-                        "travel_card_id": card_id,
-                        "hotel_name": hotel.get("hotel_name"),
-                        "location": hotel.get("location"),
-                        "check_in_date": hotel.get("check_in_date").isoformat() if hotel.get("check_in_date") else None,
-                        "check_out_date": hotel.get("check_out_date").isoformat() if hotel.get("check_out_date") else None,
-                        "room_type": hotel.get("room_type"),
-                        "price_per_night": hotel.get("price_per_night"),
-                        "total_cost": hotel.get("total_cost"),
-                    }).execute()
-            
-            # Delete hotels not in the request
-            hotels_to_delete = existing_hotel_ids - request_hotel_ids
-            for hotel_id in hotels_to_delete:
-                supabase.table("hotels").delete().eq("id", hotel_id).execute()
-        
-        # Handle transports if provided
-        if transports is not None:
-            # Get existing transport IDs in database
-            existing_transports = get_transports_by_card(card_id)
-            existing_transport_ids = {t["id"] for t in existing_transports} if existing_transports else set()
-            
-            # Track transport IDs from the request
-            request_transport_ids = set()
-            
-            for transport in transports:
-                if "id" in transport and transport["id"]:
-                    # Update existing transport
-                    request_transport_ids.add(transport["id"])
-                    transport_updates = {k: v for k, v in transport.items() if k != "id"}
-                    supabase.table("transports").update(transport_updates).eq("id", transport["id"]).eq("travel_card_id", card_id).execute()
-                else:
-                    # Create new transport
-                    supabase.table("transports").insert({
-                        "travel_card_id": card_id,
-                        "transport_type": transport.get("transport_type"),
-                        "origin": transport.get("origin"),
-                        "destination": transport.get("destination"),
-                        "departure_time": transport.get("departure_time"),
-                        "arrival_time": transport.get("arrival_time"),
-                        "booking_reference": transport.get("booking_reference"),
-                        "cost": transport.get("cost"),
-                        "is_departure": transport.get("is_departure", False),
-                    }).execute()
-            
-            # Delete transports not in the request
-            transports_to_delete = existing_transport_ids - request_transport_ids
-            for transport_id in transports_to_delete:
-                supabase.table("transports").delete().eq("id", transport_id).execute()
-        
-        # Return updated card with nested data
-        updated_card = get_travel_card_by_id(card_id, user_id)
-        return updated_card
+        card["changed"] = changed
+        return card
         
+    except CardModified:
+        uow.forget_card(card_id)
+        conflict_index.forget_user(user_id)
+        raise
     except Exception as e:
+        # A partial write may have landed, so the map can no longer be trusted
+        uow.forget_card(card_id)
+        conflict_index.forget_user(user_id)
         print(f"Error updating travel card with nested data: {e}")
         return None
 
-def delete_travel_card(card_id: str, user_id: str):
+async def _clear_tombstone(card_id: str):
+    # The card is still there, so its tombstone would mislead syncing clients
+    try:
+        await card_sync.clear_tombstone(card_id)
+    except Exception as e:
+        print(f"Error clearing tombstone: {e}")
+
+async def delete_travel_card(card_id: str, user_id: str, uow: UnitOfWork = None, expected_version: int = None):
+    """Delete a card; with ``expected_version`` raises CardModified if it was at another version."""
     try:
-        response = supabase.table("travel_cards").delete().eq("id", card_id).eq("user_id", user_id).execute()
+        # Tombstone first, so a sync never sees the card gone without one
+        await card_sync.write_tombstone(user_id, card_id, card_sync.next_version())
+    except Exception as e:
+        print(f"Error deleting travel card: {e}")
+        return False
+    query = get_client().table("travel_cards")
+    if expected_version is None:
+        query = query.delete(returning=RETURN_MINIMAL).eq("id", card_id).eq("user_id", user_id)
+    else:
+        # The deleted row tells us whether the version still matched
+        query = query.delete().eq("id", card_id).eq("user_id", user_id).eq("version", expected_version)
+    deleted, pruned = await asyncio.gather(
+        query.execute(),
+        card_sync.prune_tombstones(user_id),
+        return_exceptions=True,
+    )
+    if isinstance(pruned, Exception):
+        # Old tombstones just linger until the next delete
+        print(f"Error pruning tombstones: {pruned}")
+    if isinstance(deleted, Exception):
+        print(f"Error deleting travel card: {deleted}")
+        await _clear_tombstone(card_id)
+        return False
+    if expected_version is not None and not deleted.data:
+        # A concurrent delete leaves the card gone, and its tombstone must stay
+        if await travel_card_exists(card_id, user_id):
+            await _clear_tombstone(card_id)
+        raise CardModified(card_id)
+    try:
+        if uow is not None:
+            uow.forget_card(card_id)
+            uow.mark_missing(card_id)
+        await apply_trip_changes(user_id, {card_id: None})
+        conflict_index.card_deleted(user_id, card_id)
         return True
     except Exception as e:
         print(f"Error deleting travel card: {e}")
         return False
+
+# Single hotel/transport writes filter on the row's own user_id, a copy of its
+# card's owner that the database keeps honest (migrations/0001_nested_rows_user_id.sql
+# on Supabase, triggers in the SQLite schema)
+NESTED_ROW_BUILDERS = {"hotels": _hotel_row, "transports": _transport_row}
+NESTED_COST_COLUMNS = {"hotels": "total_cost", "transports": "cost"}
+
+async def _refresh_trip_cost(table: str, card: dict, user_id: str):
+    # The written row alone doesn't give the trip's cost, so read its siblings' costs
+    try:
+        cost_rows = await _fetch_by_card_ids(table, [card["id"]], NESTED_COST_COLUMNS[table])
+    except Exception as e:
+        print(f"Error refreshing trip stats after {table} write: {e}")
+        return
+    nested = {"hotels": None, "transports": None, table: cost_rows}
+    await apply_trip_changes(user_id, {card["id"]: trip_contribution(card, nested["hotels"], nested["transports"])})
+
+async def _after_nested_write(defer, table: str, card_id: str, user_id: str, cost_changed: bool):
+    """Bump the card's version after a single hotel/transport write.
+
+    This happens before the write is reported back, so delta sync and ETags
+    never miss it. Only the trip stats refresh (when a cost moved) goes to
+    ``defer`` (e.g. ``BackgroundTasks.add_task``), or is awaited here without
+    one. Raises RuntimeError if the card couldn't be updated: the row itself
+    is already written, so the caller can't report "not found".
+    """
+    try:
+        card_response = await get_client().table("travel_cards").update({"version": card_sync.next_version()}).eq("id", card_id).eq("user_id", user_id).execute()
+    except Exception as e:
+        print(f"Error updating travel card after {table} write: {e}")
+        raise RuntimeError(f"{table} row written but travel card {card_id} was not updated") from e
+    if not card_response.data:
+        raise RuntimeError(f"{table} row written but travel card {card_id} was not updated")
+    if cost_changed:
+        if defer is None:
+            await _refresh_trip_cost(table, card_response.data[0], user_id)
+        else:
+            defer(_refresh_trip_cost, table, card_response.data[0], user_id)
+
+async def create_nested_item(table: str, card_id: str, user_id: str, item: dict, defer=None):
+    """Add one hotel or transport to a card with a single insert.
+
+    The insert carries ``user_id`` and the database refuses it unless the
+    card belongs to that user, so None means either failure or not found.
+    ``defer`` is passed on to ``_after_nested_write``, whose RuntimeError
+    this raises too (as do the update and delete below).
+    """
+    try:
+        row = {**NESTED_ROW_BUILDERS[table](card_id, item), "user_id": user_id}
+        response = await get_client().table(table).insert(row).execute()
+        if not response.data:
+            return None
+        created = response.data[0]
+    except Exception as e:
+        print(f"Error creating {table} row: {e}")
+        return None
+    
+    if table == "hotels":
+        conflict_index.stay_written(user_id, card_id, created)
+    await _after_nested_write(defer, table, card_id, user_id, created.get(NESTED_COST_COLUMNS[table]) is not None)
+    return created
+
+async def update_nested_item(table: str, card_id: str, item_id: str, user_id: str, fields: dict, defer=None):
+    """Update the given fields of one hotel or transport; None if not found or failed."""
+    # The row builder converts values (dates); keep only the fields sent
+    updates = {k: v for k, v in NESTED_ROW_BUILDERS[table](card_id, fields).items() if k in fields}
+    try:
+        response = await get_client().table(table).update(updates).eq("id", item_id).eq("travel_card_id", card_id).eq("user_id", user_id).execute()
+        if not response.data:
+            return None
+        updated = response.data[0]
+    except Exception as e:
+        print(f"Error updating {table} row: {e}")
+        return None
+    
+    if table == "hotels":
+        conflict_index.stay_written(user_id, card_id, updated)
+    await _after_nested_write(defer, table, card_id, user_id, NESTED_COST_COLUMNS[table] in updates)
+    return updated
+
+async def delete_nested_item(table: str, card_id: str, item_id: str, user_id: str, defer=None) -> bool:
+    """Delete one hotel or transport; False if not found or failed."""
+    try:
+        response = await get_client().table(table).delete().eq("id", item_id).eq("travel_card_id", card_id).eq("user_id", user_id).execute()
+        if not response.data:
+            return False
+        deleted = response.data[0]
+    except Exception as e:
+        print(f"Error deleting {table} row: {e}")
+        return False
+    
+    if table == "hotels":
+        conflict_index.stay_deleted(user_id, card_id, item_id)
+    await _after_nested_write(defer, table, card_id, user_id, deleted.get(NESTED_COST_COLUMNS[table]) is not None)
+    return True
+
+async def nested_item_exists(table: str, card_id: str, item_id: str, user_id: str) -> bool:
+    try:
+        response = await get_client().table(table).select("id").eq("id", item_id).eq("travel_card_id", card_id).eq("user_id", user_id).limit(1).execute()
+        return bool(response.data)
+    except Exception as e:
+        print(f"Error checking {table} row: {e}")
+        return False
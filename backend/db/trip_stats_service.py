@@ -0,0 +1,214 @@
+"""Per-user trip cost aggregates, updated incrementally on every card write.
+
+Rows live in ``trip_stats`` keyed by (user_id, bucket):
+
+- ``total``: all of the user's trips
+- ``status:<status>`` and ``month:<YYYY-MM>`` (of the start date)
+- ``trip:<card id>``: one trip's own contribution, with its status and month,
+  so later writes can subtract exactly what was added
+
+On Supabase the table comes from ``migrations/0002_trip_stats.sql``; the
+SQLite schema creates it on connect.
+
+A user without a ``total`` row (cards written before this table existed,
+or no cards at all) has no baseline to apply deltas to, so the next write
+or stats read builds their rows from the cards instead.
+
+Writes are serialized per user within a worker. Anything that slips past
+that (several workers, a failed write) is repaired by
+``python -m db.rebuild_trip_stats``.
+"""
+import asyncio
+import weakref
+from db.storage import get_client, fetch_all, RETURN_MINIMAL
+
+STATS_COLUMNS = "bucket,trip_count,hotel_cost,transport_cost,status,month"
+
+# Max buckets per in_ filter when a rebuild deletes the ones that went away
+STALE_BUCKET_CHUNK_SIZE = 100
+
+_user_locks = weakref.WeakValueDictionary()
+
+def _user_lock(user_id: str) -> asyncio.Lock:
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    return lock
+
+def trip_contribution(card: dict, hotels: list = None, transports: list = None) -> dict:
+    """What one card adds to its owner's aggregates.
+
+    Without ``hotels``/``transports`` the costs are left out and are carried
+    over from the trip's previous contribution.
+    """
+    contribution = {"status": card["status"], "month": card["start_date"][:7]}
+    if hotels is not None:
+        contribution["hotel_cost"] = sum(h.get("total_cost") or 0 for h in hotels)
+    if transports is not None:
+        contribution["transport_cost"] = sum(t.get("cost") or 0 for t in transports)
+    return contribution
+
+def _buckets(contribution: dict) -> tuple:
+    return ("total", f"status:{contribution['status']}", f"month:{contribution['month']}")
+
+def _add(deltas: dict, contribution: dict, sign: int):
+    for bucket in _buckets(contribution):
+        delta = deltas.setdefault(bucket, [0, 0.0, 0.0])
+        delta[0] += sign
+        delta[1] += sign * contribution.get("hotel_cost", 0)
+        delta[2] += sign * contribution.get("transport_cost", 0)
+
+async def _fetch_buckets(user_id: str, buckets: list) -> dict:
+    if not buckets:
+        return {}
+    response = await get_client().table("trip_stats").select(STATS_COLUMNS).eq("user_id", user_id).in_("bucket", buckets).execute()
+    return {row["bucket"]: row for row in response.data or []}
+
+async def apply_trip_changes(user_id: str, changes: dict, created: bool = False):
+    """Fold card writes into the user's aggregates.
+
+    ``changes`` maps card id to its new ``trip_contribution`` (None when the
+    card was deleted). Old contributions are read from the trip rows, unless
+    ``created`` says there can't be any. Failures are logged, not raised: the
+    card write already happened and a rebuild fixes the aggregates.
+    """
+    if not changes:
+        return
+    try:
+        async with _user_lock(user_id):
+            trip_buckets = {card_id: f"trip:{card_id}" for card_id in changes}
+            previous = {} if created else await _fetch_buckets(user_id, list(trip_buckets.values()))
+
+            deltas = {}
+            trip_rows, stale_trips = [], []
+            for card_id, new in changes.items():
+                old = previous.get(trip_buckets[card_id])
+                if old is not None:
+                    _add(deltas, old, -1)
+                    if new is not None:
+                        # Costs not recomputed by the caller carry over
+                        new = {"hotel_cost": old["hotel_cost"], "transport_cost": old["transport_cost"], **new}
+                if new is None:
+                    if old is not None:
+                        stale_trips.append(trip_buckets[card_id])
+                    continue
+                new = {"hotel_cost": 0, "transport_cost": 0, **new}
+                _add(deltas, new, 1)
+                trip_rows.append({
+                    "user_id": user_id,
+                    "bucket": trip_buckets[card_id],
+                    "trip_count": 1,
+                    "hotel_cost": new["hotel_cost"],
+                    "transport_cost": new["transport_cost"],
+                    "status": new["status"],
+                    "month": new["month"],
+                })
+
+            # Aggregates the change nets out on (same status, month and costs) are left alone
+            deltas = {bucket: delta for bucket, delta in deltas.items() if any(delta)}
+            buckets = deltas.keys() | {"total"}
+            if created:
+                # A rebuild that ran after the insert may have counted the new trips already
+                buckets |= set(trip_buckets.values())
+            current = await _fetch_buckets(user_id, list(buckets))
+            if "total" not in current or (created and not current.keys().isdisjoint(trip_buckets.values())):
+                # No baseline to apply the deltas to (or it has them); the cards already include this write
+                await _rebuild(user_id)
+                return
+            rows, empty = [], []
+            for bucket, (count, hotel_cost, transport_cost) in deltas.items():
+                row = current.get(bucket, {"trip_count": 0, "hotel_cost": 0, "transport_cost": 0})
+                trip_count = row["trip_count"] + count
+                if trip_count <= 0:
+                    empty.append(bucket)
+                    continue
+                rows.append({
+                    "user_id": user_id,
+                    "bucket": bucket,
+                    "trip_count": trip_count,
+                    "hotel_cost": row["hotel_cost"] + hotel_cost,
+                    "transport_cost": row["transport_cost"] + transport_cost,
+                })
+
+            writes = []
+            # Trip rows and aggregates have different columns, so upsert them separately
+            for batch in (rows, trip_rows):
+                if batch:
+                    writes.append(get_client().table("trip_stats").upsert(batch, on_conflict="user_id,bucket", returning=RETURN_MINIMAL).execute())
+            if empty or stale_trips:
+                writes.append(get_client().table("trip_stats").delete(returning=RETURN_MINIMAL).eq("user_id", user_id).in_("bucket", empty + stale_trips).execute())
+            await asyncio.gather(*writes)
+    except Exception as e:
+        print(f"Error updating trip stats for user {user_id}: {e}")
+
+async def _replace(user_id: str, contributions: dict) -> int:
+    deltas = {}
+    rows = []
+    for card_id, contribution in contributions.items():
+        _add(deltas, contribution, 1)
+        rows.append({
+            "user_id": user_id,
+            "bucket": f"trip:{card_id}",
+            "trip_count": 1,
+            "hotel_cost": contribution["hotel_cost"],
+            "transport_cost": contribution["transport_cost"],
+            "status": contribution["status"],
+            "month": contribution["month"],
+        })
+    aggregates = [
+        {"user_id": user_id, "bucket": bucket, "trip_count": count, "hotel_cost": hotel_cost, "transport_cost": transport_cost}
+        for bucket, (count, hotel_cost, transport_cost) in deltas.items()
+    ]
+
+    existing = await fetch_all(lambda: get_client().table("trip_stats").select("bucket").eq("user_id", user_id).order("bucket"))
+    # Rows are overwritten in place, so a failed or concurrent rebuild never
+    # leaves the user without stats; only buckets no card backs any more go
+    await asyncio.gather(*(
+        get_client().table("trip_stats").upsert(batch, on_conflict="user_id,bucket", returning=RETURN_MINIMAL).execute()
+        for batch in (aggregates, rows) if batch
+    ))
+    written = {row["bucket"] for row in aggregates + rows}
+    stale = sorted({row["bucket"] for row in existing} - written)
+    await asyncio.gather(*(
+        get_client().table("trip_stats").delete(returning=RETURN_MINIMAL).eq("user_id", user_id).in_("bucket", stale[i:i + STALE_BUCKET_CHUNK_SIZE]).execute()
+        for i in range(0, len(stale), STALE_BUCKET_CHUNK_SIZE)
+    ))
+    return len(aggregates) + len(rows)
+
+async def _rebuild(user_id: str) -> tuple:
+    # Imported here: the card service records its writes through this module
+    from db.travel_card_service import get_travel_cards_with_nested
+
+    cards = await get_travel_cards_with_nested(user_id, summary=True)
+    if cards is None:
+        raise RuntimeError(f"could not load travel cards for user {user_id}")
+    contributions = {
+        card["id"]: {
+            **trip_contribution(card),
+            "hotel_cost": card["total_hotel_cost"],
+            "transport_cost": card["total_transport_cost"],
+        }
+        for card in cards
+    }
+    return len(cards), await _replace(user_id, contributions)
+
+async def rebuild_trip_stats(user_id: str) -> tuple:
+    """Recompute a user's aggregates from their cards; returns (trips, rows written)."""
+    async with _user_lock(user_id):
+        return await _rebuild(user_id)
+
+async def get_trip_stats(user_id: str):
+    def query():
+        # One row per trip plus the aggregates, so heavy users need several pages
+        return get_client().table("trip_stats").select(STATS_COLUMNS).eq("user_id", user_id).order("bucket")
+
+    try:
+        rows = await fetch_all(query)
+        if not rows:
+            # Never built (or no trips, which makes this cheap)
+            await rebuild_trip_stats(user_id)
+            rows = await fetch_all(query)
+        return rows
+    except Exception as e:
+        print(f"Error fetching trip stats: {e}")
+        return None
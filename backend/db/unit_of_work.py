@@ -0,0 +1,40 @@
+class UnitOfWork:
+    """Request-scoped identity map shared by a route and the service calls it makes.
+
+    Each card and its nested rows are loaded at most once per request; writes
+    put the rows they get back into the map instead of forcing re-reads.
+    """
+
+    def __init__(self):
+        self._cards = {}
+        self._nested = {"hotels": {}, "transports": {}}
+
+    def has_card(self, card_id: str) -> bool:
+        return card_id in self._cards
+
+    def get_card(self, card_id: str, user_id: str):
+        card = self._cards.get(card_id)
+        # Never hand out another user's card, even within one request
+        if card is None or card["user_id"] != user_id:
+            return None
+        return dict(card)
+
+    def put_card(self, card: dict):
+        self._cards[card["id"]] = {k: v for k, v in card.items() if k not in ("hotels", "transports")}
+
+    def mark_missing(self, card_id: str):
+        self._cards[card_id] = None
+
+    def forget_card(self, card_id: str):
+        self._cards.pop(card_id, None)
+        for rows in self._nested.values():
+            rows.pop(card_id, None)
+
+    def has_nested(self, table: str, card_id: str) -> bool:
+        return card_id in self._nested[table]
+
+    def get_nested(self, table: str, card_id: str) -> list:
+        return list(self._nested[table].get(card_id, []))
+
+    def put_nested(self, table: str, card_id: str, rows: list):
+        self._nested[table][card_id] = list(rows)
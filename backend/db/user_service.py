@@ -0,0 +1,34 @@
+from db.storage import get_client, fetch_all
+from db.projections import USER_COLUMNS, USER_AUTH_COLUMNS
+
+async def user_exists(email: str) -> bool:
+    response = await get_client().table("users").select("id").eq("email", email).limit(1).execute()
+    return bool(response.data)
+
+async def get_user_by_email(email: str):
+    response = await get_client().table("users").select(USER_AUTH_COLUMNS).eq("email", email).execute()
+    if response.data:
+        return response.data[0]
+    return None
+
+async def create_user(email: str, password_hash: str, full_name: str):
+    response = await get_client().table("users").insert({
+        "email": email,
+        "password_hash": password_hash,
+        "full_name": full_name
+    }).execute()
+    return response.data[0] if response.data else None
+
+async def get_user_by_id(user_id: str):
+    response = await get_client().table("users").select(USER_COLUMNS).eq("id", user_id).execute()
+    if response.data:
+        return response.data[0]
+    return None
+
+async def update_user_password_hash(user_id: str, password_hash: str):
+    response = await get_client().table("users").update({"password_hash": password_hash}).eq("id", user_id).execute()
+    return response.data[0] if response.data else None
+
+async def get_all_user_ids() -> list:
+    rows = await fetch_all(lambda: get_client().table("users").select("id").order("id"))
+    return [row["id"] for row in rows]
@@ -1,10 +1,39 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import FRONTEND_URL
+from config import FRONTEND_URL, WARMUP_CONNECTIONS, validate_config
+from db.storage import init_storage, close_storage, warm_up_storage
+from utils.password import start_password_pool, shutdown_password_pool, warm_password_pool
 from routes.auth import router as auth_router
 from routes.travel_cards import router as travel_cards_router
+from routes.metrics import router as metrics_router
+from routes.health import router as health_router
+from utils.metrics import MetricsMiddleware
+from utils.wire_format import WireFormatMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_config()
+    app.state.ready = False
+    start_password_pool()
+    await init_storage()
+    
+    if WARMUP_CONNECTIONS > 0:
+        # Pay connection setup and worker spawn before /readyz says yes,
+        # not on the first real requests
+        try:
+            await asyncio.gather(warm_up_storage(WARMUP_CONNECTIONS), warm_password_pool())
+        except Exception as e:
+            print(f"Error warming up: {e}")
+    
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await close_storage()
+    shutdown_password_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware - allow frontend domains
 allowed_origins = [
@@ -23,12 +52,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
 )
 
+# Negotiated compression and MessagePack for the travel card endpoints
+app.add_middleware(WireFormatMiddleware)
+
+# Added last so it wraps CORS too and times the whole request
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(travel_cards_router, prefix="/api", tags=["travel-cards"])
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Raahi Backend API"}
\ No newline at end of file
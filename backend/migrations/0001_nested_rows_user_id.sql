@@ -0,0 +1,38 @@
+-- Hotels and transports carry their card owner's user_id, so a single-row
+-- write can check ownership in the same statement. The composite foreign
+-- key keeps that copy equal to the card's owner.
+--
+-- Apply to the Supabase database (SQL editor or psql) before deploying the
+-- code that writes these columns; card creation fails without them. The
+-- SQLite backend makes the same change itself on connect. Safe to run again.
+
+begin;
+
+-- What the composite foreign keys below point at
+create unique index if not exists travel_cards_id_user_id_key on travel_cards (id, user_id);
+
+alter table hotels add column if not exists user_id uuid references users(id) on delete cascade;
+update hotels set user_id = c.user_id
+    from travel_cards c
+    where c.id = hotels.travel_card_id and hotels.user_id is null;
+-- Rows without a card have no owner to copy, and nothing can read or write
+-- them: every query goes through a card the user owns
+delete from hotels where user_id is null;
+alter table hotels
+    alter column user_id set not null,
+    drop constraint if exists hotels_card_owner_fkey,
+    add constraint hotels_card_owner_fkey foreign key (travel_card_id, user_id)
+        references travel_cards (id, user_id) on delete cascade;
+
+alter table transports add column if not exists user_id uuid references users(id) on delete cascade;
+update transports set user_id = c.user_id
+    from travel_cards c
+    where c.id = transports.travel_card_id and transports.user_id is null;
+delete from transports where user_id is null;
+alter table transports
+    alter column user_id set not null,
+    drop constraint if exists transports_card_owner_fkey,
+    add constraint transports_card_owner_fkey foreign key (travel_card_id, user_id)
+        references travel_cards (id, user_id) on delete cascade;
+
+commit;
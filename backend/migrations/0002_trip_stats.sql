@@ -0,0 +1,23 @@
+-- Per-user trip cost aggregates kept by db/trip_stats_service.py. Writes
+-- upsert on (user_id, bucket), so that pair has to be unique.
+--
+-- Apply to the Supabase database (SQL editor or psql) before deploying the
+-- code that maintains trip stats; every card write updates them. The SQLite
+-- backend creates the table itself on connect. Users with cards from before
+-- this table get their rows built on their next card write or stats read.
+
+begin;
+
+create table if not exists trip_stats (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null references users(id) on delete cascade,
+    bucket text not null,
+    trip_count integer not null default 0,
+    hotel_cost double precision not null default 0,
+    transport_cost double precision not null default 0,
+    status text,
+    month text,
+    unique (user_id, bucket)
+);
+
+commit;
@@ -0,0 +1,26 @@
+-- Per-card versions and tombstones behind GET /travel-cards/changes
+-- (db/card_sync.py). Every card create and update stamps version, and every
+-- delete writes a tombstone.
+--
+-- Apply to the Supabase database (SQL editor or psql) before deploying the
+-- code that writes these columns; card writes fail without them. The SQLite
+-- backend makes the same change itself on connect.
+
+begin;
+
+alter table travel_cards add column if not exists version bigint not null default 0;
+-- Existing cards need a real version: at 0 a card sorts before every
+-- retained tombstone, where a sync cursor would look expired
+update travel_cards
+    set version = (extract(epoch from clock_timestamp()) * 1000000)::bigint
+    where version = 0;
+create index if not exists travel_cards_user_version on travel_cards (user_id, version, id);
+
+create table if not exists travel_card_tombstones (
+    id uuid primary key,  -- the deleted card's id
+    user_id uuid not null references users(id) on delete cascade,
+    version bigint not null
+);
+create index if not exists travel_card_tombstones_user_version on travel_card_tombstones (user_id, version, id);
+
+commit;
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date
 
 class HotelRequest(BaseModel):
+    id: Optional[str] = None
     hotel_name: Optional[str] = None
     location: Optional[str] = None
     check_in_date: Optional[date] = None
@@ -12,6 +13,7 @@ class HotelRequest(BaseModel):
     total_cost: Optional[float] = None
 
 class TransportRequest(BaseModel):
+    id: Optional[str] = None
     transport_type: Optional[str] = None
     origin: Optional[str] = None
     destination: Optional[str] = None
@@ -63,6 +65,20 @@ class TravelCardResponse(BaseModel):
     hotels: Optional[List[HotelResponse]] = None
     transports: Optional[List[TransportResponse]] = None
 
+class TravelCardSummaryResponse(BaseModel):
+    id: str
+    user_id: str
+    destination: str
+    start_date: date
+    end_date: date
+    duration_days: int
+    status: str
+    hotel_count: int = 0
+    transport_count: int = 0
+    total_hotel_cost: float = 0
+    total_transport_cost: float = 0
+    first_departure: Optional[str] = None
+
 class TravelCardUpdateRequest(BaseModel):
     destination: Optional[str] = None
     start_date: Optional[date] = None
@@ -70,3 +86,55 @@ class TravelCardUpdateRequest(BaseModel):
     status: Optional[str] = None
     hotels: Optional[List[HotelRequest]] = None
     transports: Optional[List[TransportRequest]] = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchImportResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
+
+class CostTotals(BaseModel):
+    trip_count: int = 0
+    hotel_cost: float = 0
+    transport_cost: float = 0
+    total_cost: float = 0
+
+class TripCost(BaseModel):
+    card_id: str
+    status: str
+    month: str
+    hotel_cost: float = 0
+    transport_cost: float = 0
+    total_cost: float = 0
+
+class TravelStatsResponse(BaseModel):
+    total: CostTotals
+    by_status: Dict[str, CostTotals]
+    by_month: Dict[str, CostTotals]
+    trips: List[TripCost]
+
+class ConflictItem(BaseModel):
+    card_id: Optional[str] = None
+    hotel_id: Optional[str] = None
+    label: Optional[str] = None
+
+class Conflict(BaseModel):
+    first: ConflictItem
+    second: ConflictItem
+    overlap_start: str
+    overlap_end: str
+
+class ConflictsResponse(BaseModel):
+    trips: List[Conflict]
+    hotels: List[Conflict]
+
+class TravelCardChangesResponse(BaseModel):
+    changed: List[TravelCardResponse]
+    deleted: List[str]
+    cursor: str
+    has_more: bool
@@ -1,25 +1,42 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
 from models.auth import RegisterRequest, LoginRequest, AuthResponse, CurrentUser
-from utils.password import hash_password, verify_password
-from utils.jwt_handler import create_access_token
-from db.supabase_client import get_user_by_email, create_user
-from routes.dependencies import get_current_user
+from utils.password import hash_password_async, verify_password_async, needs_rehash, PasswordHashingBusy
+from utils.jwt_handler import create_access_token, revoke_token
+from db.user_service import user_exists, get_user_by_email, create_user, update_user_password_hash
+from routes.dependencies import get_current_user, get_bearer_token
 
 router = APIRouter()
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+async def _rehash_password(user_id: str, password: str):
+    # Upgrade hashes made with an older work factor; best effort
+    try:
+        password_hash = await hash_password_async(password)
+        await update_user_password_hash(user_id, password_hash)
+    except Exception as e:
+        print(f"Error rehashing password: {e}")
+
 @router.post("/register", response_model=AuthResponse)
-def register(request: RegisterRequest):
+async def register(request: RegisterRequest):
     # Check if user already exists
-    existing_user = get_user_by_email(request.email)
-    if existing_user:
+    if await user_exists(request.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Hash password and create user
-    password_hash = hash_password(request.password)
-    user = create_user(request.email, password_hash, request.full_name)
+    try:
+        password_hash = await hash_password_async(request.password)
+    except PasswordHashingBusy:
+        raise _hashing_busy()
+    user = await create_user(request.email, password_hash, request.full_name)
     
     if not user:
         raise HTTPException(
@@ -40,9 +57,9 @@ def register(request: RegisterRequest):
     )
 
 @router.post("/login", response_model=AuthResponse)
-def login(request: LoginRequest):
+async def login(request: LoginRequest, background_tasks: BackgroundTasks):
     # Find user by email
-    user = get_user_by_email(request.email)
+    user = await get_user_by_email(request.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,12 +67,20 @@ def login(request: LoginRequest):
         )
     
     # Verify password
-    if not verify_password(request.password, user["password_hash"]):
+    try:
+        valid = await verify_password_async(request.password, user["password_hash"])
+    except PasswordHashingBusy:
+        raise _hashing_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
+    # Transparently move the stored hash to the configured work factor
+    if needs_rehash(user["password_hash"]):
+        background_tasks.add_task(_rehash_password, user["id"], request.password)
+    
     # Generate JWT token
     token = create_access_token(user["id"], user["email"], user["full_name"])
     
@@ -69,14 +94,18 @@ def login(request: LoginRequest):
     )
 
 @router.post("/logout", response_model=AuthResponse)
-def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    current_user: dict = Depends(get_current_user),
+    token: str = Depends(get_bearer_token)
+):
+    revoke_token(token)
     return AuthResponse(
         success=True,
         message="Logged out successfully"
     )
 
 @router.get("/me")
-def get_user_profile(current_user: dict = Depends(get_current_user)):
+async def get_user_profile(current_user: dict = Depends(get_current_user)):
     return {
         "success": True,
         "user_id": current_user["user_id"],
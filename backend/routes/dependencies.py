@@ -1,7 +1,8 @@
 from fastapi import Depends, HTTPException, status, Header
-from utils.jwt_handler import verify_token, extract_token_from_header
+from utils.jwt_handler import verify_token_cached, extract_token_from_header
+from db.unit_of_work import UnitOfWork
 
-async def get_current_user(authorization: str = Header(None)):
+async def get_bearer_token(authorization: str = Header(None)) -> str:
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -17,7 +18,10 @@ async def get_current_user(authorization: str = Header(None)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    payload = verify_token(token)
+    return token
+
+async def get_current_user(token: str = Depends(get_bearer_token)):
+    payload = verify_token_cached(token)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,3 +30,8 @@ async def get_current_user(authorization: str = Header(None)):
         )
     
     return payload
+
+def get_unit_of_work() -> UnitOfWork:
+    # FastAPI caches dependencies per request, so the route and any
+    # sub-dependencies share this one instance
+    return UnitOfWork()
@@ -0,0 +1,24 @@
+import asyncio
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+from config import READINESS_TIMEOUT_SECONDS
+from db.storage import ping_storage
+
+router = APIRouter()
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    # Liveness only: the process is up and serving requests
+    return {"status": "ok"}
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(request: Request):
+    # Ready once the lifespan finished warming up, and only while storage answers
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        await asyncio.wait_for(ping_storage(), READINESS_TIMEOUT_SECONDS)
+    except Exception as e:
+        print(f"Error checking readiness: {e}")
+        return JSONResponse({"status": "unavailable"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready"}
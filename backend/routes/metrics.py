@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from db.query_stats import get_query_stats
+from routes.travel_cards import card_list_cache, card_cache, card_events
+from utils.jwt_handler import get_token_cache_stats
+from utils.metrics import render_metric, render_request_metrics
+from utils.password import get_hashing_stats
+from utils.wire_format import encoded_cache, get_wire_format_stats
+
+router = APIRouter()
+
+def _query_metrics() -> list:
+    stats = [(dict(zip(("method", "table"), key.split(" ", 1))), s) for key, s in sorted(get_query_stats().items())]
+    return [
+        *render_metric("raahi_db_queries_total", "counter", "Database round trips", [(labels, s["count"]) for labels, s in stats]),
+        *render_metric("raahi_db_query_seconds_total", "counter", "Time spent in database round trips", [(labels, s["seconds"]) for labels, s in stats]),
+        *render_metric("raahi_db_response_bytes_total", "counter", "Bytes received from the database", [(labels, s["bytes"]) for labels, s in stats]),
+        *render_metric("raahi_db_response_bytes_max", "gauge", "Largest single database response", [(labels, s["max_bytes"]) for labels, s in stats]),
+    ]
+
+def _hashing_metrics() -> list:
+    stats = get_hashing_stats()
+    operations = [({"operation": op}, stats[op]) for op in ("hash", "verify")]
+    return [
+        *render_metric("raahi_password_operations_total", "counter", "Completed bcrypt operations", [(labels, s["count"]) for labels, s in operations]),
+        *render_metric("raahi_password_operation_seconds_total", "counter", "Time spent in bcrypt operations", [(labels, s["total_seconds"]) for labels, s in operations]),
+        *render_metric("raahi_password_operation_seconds_max", "gauge", "Slowest bcrypt operation", [(labels, s["max_seconds"]) for labels, s in operations]),
+        *render_metric("raahi_password_operations_rejected_total", "counter", "bcrypt operations shed because the queue was full", [(labels, s["rejected"]) for labels, s in operations]),
+        *render_metric("raahi_password_operations_pending", "gauge", "bcrypt operations queued or running", [({}, stats["pending"])]),
+    ]
+
+def _cache_metrics() -> list:
+    token_stats = get_token_cache_stats()
+    caches = [
+        ({"cache": "card_list"}, card_list_cache.stats()),
+        ({"cache": "card"}, card_cache.stats()),
+        ({"cache": "token_verified"}, token_stats["verified"]),
+        ({"cache": "token_revoked"}, token_stats["revoked"]),
+        ({"cache": "encoded_body"}, encoded_cache.stats()),
+    ]
+    return [
+        *render_metric("raahi_cache_hits_total", "counter", "Cache hits", [(labels, s["hits"]) for labels, s in caches]),
+        *render_metric("raahi_cache_misses_total", "counter", "Cache misses", [(labels, s["misses"]) for labels, s in caches]),
+        *render_metric("raahi_cache_evictions_total", "counter", "Entries evicted to stay within maxsize", [(labels, s["evictions"]) for labels, s in caches]),
+        *render_metric("raahi_cache_entries", "gauge", "Entries currently cached", [(labels, s["size"]) for labels, s in caches]),
+    ]
+
+def _wire_format_metrics() -> list:
+    stats = [({"format": name}, s) for name, s in sorted(get_wire_format_stats().items())]
+    return [
+        *render_metric("raahi_wire_responses_total", "counter", "Responses sent per wire format", [(labels, s["responses"]) for labels, s in stats]),
+        *render_metric("raahi_wire_json_bytes_total", "counter", "JSON bytes before encoding", [(labels, s["json_bytes"]) for labels, s in stats]),
+        *render_metric("raahi_wire_bytes_total", "counter", "Body bytes sent after encoding", [(labels, s["wire_bytes"]) for labels, s in stats]),
+        *render_metric("raahi_wire_encode_seconds_total", "counter", "Time spent encoding response bodies", [(labels, s["encode_seconds"]) for labels, s in stats]),
+    ]
+
+def _event_metrics() -> list:
+    stats = card_events.stats()
+    return [
+        *render_metric("raahi_event_streams", "gauge", "Open travel card event streams", [({}, stats["subscribers"])]),
+        *render_metric("raahi_events_published_total", "counter", "Travel card events published", [({}, stats["published"])]),
+        *render_metric("raahi_events_delivered_total", "counter", "Events queued to open streams", [({}, stats["delivered"])]),
+        *render_metric("raahi_events_dropped_total", "counter", "Events dropped for streams that fell behind", [({}, stats["dropped"])]),
+        *render_metric("raahi_event_stream_overflows_total", "counter", "Times a stream fell behind and was told to resync", [({}, stats["overflows"])]),
+    ]
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    lines = [*render_request_metrics(), *_query_metrics(), *_hashing_metrics(), *_cache_metrics(), *_wire_format_metrics(), *_event_metrics()]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,27 +1,184 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import json
+import time
+from datetime import date
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from models.travel_card import (
     TravelCardCreateRequest,
     TravelCardUpdateRequest,
     TravelCardResponse,
+    BatchItemResult,
+    BatchImportResponse,
+    CostTotals,
+    TripCost,
+    TravelStatsResponse,
+    Conflict,
+    ConflictItem,
+    ConflictsResponse,
+    TravelCardChangesResponse,
+    HotelRequest,
     HotelResponse,
+    TransportRequest,
     TransportResponse,
 )
+from pydantic import TypeAdapter, ValidationError
 from db.travel_card_service import (
     create_travel_card_with_nested,
-    get_travel_cards_by_user,
+    create_travel_cards_batch,
+    get_travel_cards_with_nested,
+    get_travel_cards_page,
+    iter_travel_card_pages,
+    get_travel_card_changes,
+    get_travel_card_with_nested,
     get_travel_card_by_id,
-    get_hotels_by_card,
-    get_transports_by_card,
+    get_travel_card_version,
+    travel_card_exists,
     update_travel_card_with_nested,
     delete_travel_card,
+    create_nested_item,
+    update_nested_item,
+    delete_nested_item,
+    nested_item_exists,
+    CardModified,
 )
-from routes.dependencies import get_current_user
+from db.trip_stats_service import get_trip_stats
+from db.conflict_index import get_user_intervals, find_card_conflicts
+from db import card_sync
+from routes.dependencies import get_bearer_token, get_current_user, get_unit_of_work
+from db.unit_of_work import UnitOfWork
+from utils.cache import TTLCache
+from utils.etag import compute_etag, etag_matches
+from utils.serialization import render_card, render_card_lines, render_cards, render_changes, render_nested_item
+from utils.pagination import encode_cursor, decode_cursor
+from utils.pubsub import EventHub, format_event
+from utils.jwt_handler import verify_token_cached
+from config import CARD_CACHE_TTL_SECONDS, CARD_CACHE_MAX_USERS, CARD_CACHE_MAX_CARDS, EXPORT_CHUNK_SIZE, BATCH_MAX_ITEMS, BATCH_INSERT_CHUNK_SIZE, SYNC_SETTLE_SECONDS
+from config import SSE_QUEUE_SIZE, SSE_MAX_STREAMS_PER_USER, SSE_HEARTBEAT_SECONDS, SSE_MAX_STREAM_SECONDS
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DEFAULT_CHANGES_PAGE_SIZE = 100
+MAX_CHANGES_PAGE_SIZE = 500
 
 router = APIRouter()
 
+# Assembled responses and their ETags keyed by (user_id, view) for the full list
+# and (user_id, card_id) for single cards
+card_list_cache = TTLCache(maxsize=CARD_CACHE_MAX_USERS, ttl=CARD_CACHE_TTL_SECONDS)
+card_cache = TTLCache(maxsize=CARD_CACHE_MAX_CARDS, ttl=CARD_CACHE_TTL_SECONDS)
+
+# Card writes pushed to the user's open /travel-cards/stream connections
+card_events = EventHub(queue_size=SSE_QUEUE_SIZE, max_subscribers_per_key=SSE_MAX_STREAMS_PER_USER)
+
+def publish_card_deleted(user_id: str, card_id: str):
+    card_events.publish(user_id, "deleted", json.dumps({"id": card_id}, separators=(",", ":")).encode())
+
+def invalidate_cards(user_id: str, card_id: str = None):
+    card_list_cache.invalidate((user_id, "full"))
+    card_list_cache.invalidate((user_id, "summary"))
+    if card_id:
+        card_cache.invalidate((user_id, card_id))
+
+def _cache_entry(body: bytes) -> tuple:
+    return body, compute_etag(body)
+
+def json_response(body: bytes, status_code: int = status.HTTP_200_OK, headers: dict = None) -> Response:
+    # Bodies are already rendered, so skip response_model validation/encoding
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+async def load_card_list(user_id: str, view: str = "full"):
+    cached = card_list_cache.get((user_id, view))
+    if cached is not None:
+        return cached
+    
+    version = card_list_cache.version((user_id, view))
+    cards = await get_travel_cards_with_nested(user_id, summary=view == "summary")
+    if cards is None:
+        return None
+    
+    entry = _cache_entry(render_cards(cards, view))
+    card_list_cache.set((user_id, view), entry, version)
+    return entry
+
+async def load_card(user_id: str, card_id: str, uow: UnitOfWork = None):
+    cached = card_cache.get((user_id, card_id))
+    if cached is not None:
+        return cached
+    
+    version = card_cache.version((user_id, card_id))
+    card = await get_travel_card_with_nested(card_id, user_id, uow)
+    if not card:
+        return None
+    
+    entry = _cache_entry(render_card(card))
+    card_cache.set((user_id, card_id), entry, version)
+    return entry
+
+def _card_modified() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Travel card has been modified"
+    )
+
+async def check_if_match(user_id: str, card_id: str, if_match: str, uow: UnitOfWork = None):
+    """Return the card version an If-Match ETag was checked against (None without one).
+
+    The card is read fresh rather than from the cache, so the version belongs
+    to the content the ETag is compared with; the write then only lands if
+    the card is still at that version.
+    """
+    if if_match is None:
+        return None
+    version = await get_travel_card_version(card_id, user_id, uow)
+    card = await get_travel_card_with_nested(card_id, user_id, uow) if version is not None else None
+    if card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Travel card not found"
+        )
+    if not etag_matches(if_match, compute_etag(render_card(card)), weak=False):
+        raise _card_modified()
+    return version
+
+def _conflicts_response(trip_conflicts: list, stay_conflicts: list) -> ConflictsResponse:
+    def build(conflicts):
+        return [
+            Conflict(first=ConflictItem(**first), second=ConflictItem(**second), overlap_start=start, overlap_end=end)
+            for first, second, start, end in conflicts
+        ]
+    return ConflictsResponse(trips=build(trip_conflicts), hotels=build(stay_conflicts))
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+async def reject_conflicts(user_id: str, card: dict, hotels: list = None):
+    """Raise 409 if the card's dates or hotel stays overlap the user's others."""
+    intervals = await get_user_intervals(user_id)
+    if intervals is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to check for conflicts"
+        )
+    card = {**card, "start_date": _iso(card["start_date"]), "end_date": _iso(card["end_date"])}
+    if hotels:
+        hotels = [
+            {**h, "check_in_date": _iso(h.get("check_in_date")), "check_out_date": _iso(h.get("check_out_date"))}
+            for h in hotels
+        ]
+    trip_conflicts, stay_conflicts = find_card_conflicts(intervals, card, hotels)
+    if trip_conflicts or stay_conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Travel card overlaps existing bookings",
+                "conflicts": _conflicts_response(trip_conflicts, stay_conflicts).model_dump(),
+            }
+        )
+
 @router.post("/travel-cards", response_model=TravelCardResponse)
-def create_travel_card(
+async def create_travel_card(
     request: TravelCardCreateRequest,
+    check_conflicts: bool = Query(False, description="Reject with 409 if the trip or its hotel stays overlap existing ones"),
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["user_id"]
@@ -34,10 +191,13 @@ def create_travel_card(
         )
     
     # Convert hotel/transport requests to dicts for service
-    hotels = [h.dict() for h in request.hotels] if request.hotels else None
-    transports = [t.dict() for t in request.transports] if request.transports else None
+    hotels = [h.dict() for h in request.hotels] if request.hotels is not None else None
+    transports = [t.dict() for t in request.transports] if request.transports is not None else None
     
-    card = create_travel_card_with_nested(
+    if check_conflicts:
+        await reject_conflicts(user_id, {"destination": request.destination, "start_date": request.start_date, "end_date": request.end_date}, hotels)
+    
+    card = await create_travel_card_with_nested(
         user_id,
         request.destination,
         request.start_date,
@@ -53,101 +213,388 @@ def create_travel_card(
             detail="Failed to create travel card"
         )
     
-    # Fetch nested data
-    hotels_data = get_hotels_by_card(card["id"]) if request.hotels else None
-    transports_data = get_transports_by_card(card["id"]) if request.transports else None
-    
-    return TravelCardResponse(
-        id=card["id"],
-        user_id=card["user_id"],
-        destination=card["destination"],
-        start_date=card["start_date"],
-        end_date=card["end_date"],
-        duration_days=card["duration_days"],
-        status=card["status"],
-        hotels=hotels_data,
-        transports=transports_data,
+    invalidate_cards(user_id)
+    
+    # Nested rows come back from the inserts; omit the ones not requested
+    if request.hotels is None:
+        card["hotels"] = None
+    if request.transports is None:
+        card["transports"] = None
+    
+    body = render_card(card)
+    card_events.publish(user_id, "created", body)
+    return json_response(body)
+
+_create_request_adapter = TypeAdapter(TravelCardCreateRequest)
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    """Split a batch body into raw items; NDJSON lines that aren't JSON become errors."""
+    if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError("Invalid JSON"))
+        return items
+    
+    try:
+        items = json.loads(body)
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array or an NDJSON body"
+        )
+    return items
+
+def _validate_batch_item(item) -> tuple:
+    """Return (card dict, None) for a valid item or (None, error message)."""
+    if isinstance(item, Exception):
+        return None, str(item)
+    try:
+        card = _create_request_adapter.validate_python(item)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    if card.end_date < card.start_date:
+        return None, "End date must be after start date"
+    return card.model_dump(), None
+
+@router.post("/travel-cards/batch", response_model=BatchImportResponse)
+async def create_travel_cards_batch_endpoint(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    user_id = current_user["user_id"]
+    
+    items = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BATCH_MAX_ITEMS} travel cards per batch"
+        )
+    
+    # Validate everything first; only the valid items are written
+    results = [BatchItemResult(index=i, success=False) for i in range(len(items))]
+    valid = []
+    for result, item in zip(results, items):
+        card, error = _validate_batch_item(item)
+        if error:
+            result.error = error
+        else:
+            valid.append((result, card))
+    
+    if valid:
+        created = await create_travel_cards_batch(user_id, [card for _, card in valid], BATCH_INSERT_CHUNK_SIZE)
+        for (result, _), card in zip(valid, created):
+            if card:
+                result.success = True
+                result.id = card["id"]
+                if card_events.has_subscribers(user_id):
+                    card_events.publish(user_id, "created", render_card(card))
+            else:
+                result.error = "Failed to create travel card"
+        invalidate_cards(user_id)
+    
+    created_count = sum(result.success for result in results)
+    return BatchImportResponse(
+        created=created_count,
+        failed=len(results) - created_count,
+        results=results,
+    )
+
+async def load_card_page(user_id: str, view: str, status_filter: str, start_after: date, end_before: date, destination: str, sort: str, cursor: str, limit: int):
+    descending = sort.startswith("-")
+    sort_column = sort.lstrip("-")
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    cards, last_key = await get_travel_cards_page(
+        user_id,
+        status=status_filter,
+        start_after=start_after,
+        end_before=end_before,
+        destination_prefix=destination,
+        sort=sort_column,
+        descending=descending,
+        after=after,
+        limit=limit or DEFAULT_PAGE_SIZE,
+        summary=view == "summary",
     )
+    if cards is None:
+        return None, None
+    
+    next_cursor = encode_cursor(sort, *last_key) if last_key else None
+    return _cache_entry(render_cards(cards, view)), next_cursor
 
 @router.get("/travel-cards")
-def get_all_travel_cards(current_user: dict = Depends(get_current_user)):
+async def get_all_travel_cards(
+    view: str = Query("full", pattern="^(full|summary)$", description="summary returns per-card rollups instead of nested hotels and transports"),
+    status_filter: str = Query(None, alias="status"),
+    start_after: date = Query(None, description="Only cards starting on or after this date"),
+    end_before: date = Query(None, description="Only cards ending on or before this date"),
+    destination: str = Query(None, description="Case-insensitive destination prefix"),
+    sort: str = Query("start_date", pattern="^-?(start_date|end_date|destination)$"),
+    cursor: str = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor header"),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    if_none_match: str = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     user_id = current_user["user_id"]
     
-    cards = get_travel_cards_by_user(user_id)
+    # The plain unfiltered list is what the dashboard polls, so only it is cached
+    paged = any(p is not None for p in (status_filter, start_after, end_before, destination, cursor, limit)) or sort != "start_date"
+    next_cursor = None
+    if paged:
+        entry, next_cursor = await load_card_page(user_id, view, status_filter, start_after, end_before, destination, sort, cursor, limit)
+    else:
+        entry = await load_card_list(user_id, view)
     
-    if cards is None:
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch travel cards"
         )
     
-    # Add nested data to each card
-    cards_with_nested = []
-    for card in cards:
-        hotels = get_hotels_by_card(card["id"])
-        transports = get_transports_by_card(card["id"])
-        
-        card_response = TravelCardResponse(
-            id=card["id"],
-            user_id=card["user_id"],
-            destination=card["destination"],
-            start_date=card["start_date"],
-            end_date=card["end_date"],
-            duration_days=card["duration_days"],
-            status=card["status"],
-            hotels=hotels,
-            transports=transports,
+    body, etag = entry
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return json_response(body, headers=headers)
+
+@router.get("/travel-cards/export")
+async def export_travel_cards(current_user: dict = Depends(get_current_user)):
+    user_id = current_user["user_id"]
+    pages = iter_travel_card_pages(user_id, EXPORT_CHUNK_SIZE)
+    
+    # Fetch the first page up front so a failing database still gets a 500
+    # instead of an empty 200 stream
+    try:
+        first_page = await anext(pages, [])
+    except RuntimeError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export travel cards"
+        )
+    
+    async def lines():
+        yield render_card_lines(first_page)
+        async for cards in pages:
+            yield render_card_lines(cards)
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="travel-cards.ndjson"'},
+    )
+
+def _cost_totals(row: dict) -> CostTotals:
+    return CostTotals(
+        trip_count=row["trip_count"],
+        hotel_cost=row["hotel_cost"],
+        transport_cost=row["transport_cost"],
+        total_cost=row["hotel_cost"] + row["transport_cost"],
+    )
+
+@router.get("/travel-cards/stats", response_model=TravelStatsResponse)
+async def get_travel_card_stats(current_user: dict = Depends(get_current_user)):
+    user_id = current_user["user_id"]
+    
+    rows = await get_trip_stats(user_id)
+    if rows is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch travel card stats"
         )
-        cards_with_nested.append(card_response)
     
-    return cards_with_nested
+    stats = TravelStatsResponse(total=CostTotals(), by_status={}, by_month={}, trips=[])
+    for row in rows:
+        kind, _, key = row["bucket"].partition(":")
+        if kind == "total":
+            stats.total = _cost_totals(row)
+        elif kind == "status":
+            stats.by_status[key] = _cost_totals(row)
+        elif kind == "month":
+            stats.by_month[key] = _cost_totals(row)
+        elif kind == "trip":
+            stats.trips.append(TripCost(
+                card_id=key,
+                status=row["status"],
+                month=row["month"],
+                hotel_cost=row["hotel_cost"],
+                transport_cost=row["transport_cost"],
+                total_cost=row["hotel_cost"] + row["transport_cost"],
+            ))
+    stats.by_month = dict(sorted(stats.by_month.items()))
+    stats.trips.sort(key=lambda trip: (trip.month, trip.card_id))
+    return stats
+
+@router.get("/travel-cards/conflicts", response_model=ConflictsResponse)
+async def get_travel_card_conflicts(current_user: dict = Depends(get_current_user)):
+    user_id = current_user["user_id"]
+    
+    intervals = await get_user_intervals(user_id)
+    if intervals is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch travel card conflicts"
+        )
+    return _conflicts_response(*intervals.conflicts())
+
+@router.get("/travel-cards/changes", response_model=TravelCardChangesResponse)
+async def get_travel_card_changes_endpoint(
+    since: str = Query(None, description="Cursor from the previous response; omit to start a full sync"),
+    limit: int = Query(DEFAULT_CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    user_id = current_user["user_id"]
+    
+    after = None
+    if since:
+        try:
+            after = decode_cursor(since, "changes")
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        if not isinstance(after[0], int) or not isinstance(after[1], str):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        # Version 0 is a card not yet stamped with a real version, not an old cursor
+        if 0 < after[0] < card_sync.oldest_syncable_version():
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync cursor has expired; sync again without since"
+            )
+    
+    cards, deleted, last_key = await get_travel_card_changes(user_id, after, limit)
+    if cards is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to fetch travel card changes"
+        )
+    
+    has_more = last_key is not None
+    if not has_more:
+        # Caught up: hold the cursor a little behind the present so writes
+        # stamped just before now but not yet visible aren't skipped
+        last_key = max(after or (0, ""), (card_sync.version_at(SYNC_SETTLE_SECONDS), ""))
+    return json_response(render_changes(cards, deleted, encode_cursor("changes", *last_key), has_more))
+
+@router.get("/travel-cards/stream")
+async def stream_travel_card_events(
+    token: str = Depends(get_bearer_token),
+    current_user: dict = Depends(get_current_user)
+):
+    """Server-Sent Events: created/updated (full card), deleted ({"id"}) and resync.
+
+    Single hotel/transport writes send hotel_created/hotel_updated (the row),
+    hotel_deleted ({"id", "travel_card_id"}) and the transport_ equivalents.
+
+    resync means events were dropped because the client fell behind; it
+    should catch up through /travel-cards/changes. EventSource can't send an
+    Authorization header, so browsers read this with fetch instead.
+    """
+    user_id = current_user["user_id"]
+    
+    # Checking the limit and taking the slot happen together, so concurrent
+    # requests can't both get past it
+    subscription = card_events.subscribe(user_id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams"
+        )
+    
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            closes_at = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            next_check = time.monotonic() + SSE_HEARTBEAT_SECONDS
+            while time.monotonic() < closes_at:
+                event = await subscription.get(timeout=min(SSE_HEARTBEAT_SECONDS, max(closes_at - time.monotonic(), 0)))
+                if time.monotonic() >= next_check:
+                    # End the stream once the token expires or is revoked by logout
+                    if not verify_token_cached(token):
+                        return
+                    next_check = time.monotonic() + SSE_HEARTBEAT_SECONDS
+                if event is None:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield b": ping\n\n"
+                else:
+                    yield format_event(*event)
+        finally:
+            card_events.unsubscribe(user_id, subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/travel-cards/{card_id}", response_model=TravelCardResponse)
-def get_travel_card(card_id: str, current_user: dict = Depends(get_current_user)):
+async def get_travel_card(
+    card_id: str,
+    if_none_match: str = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
     user_id = current_user["user_id"]
     
-    card = get_travel_card_by_id(card_id, user_id)
+    entry = await load_card(user_id, card_id)
     
-    if not card:
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Travel card not found"
         )
     
-    hotels = get_hotels_by_card(card_id)
-    transports = get_transports_by_card(card_id)
+    body, etag = entry
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     
-    return TravelCardResponse(
-        id=card["id"],
-        user_id=card["user_id"],
-        destination=card["destination"],
-        start_date=card["start_date"],
-        end_date=card["end_date"],
-        duration_days=card["duration_days"],
-        status=card["status"],
-        hotels=hotels,
-        transports=transports,
-    )
+    return json_response(body, headers={"ETag": etag})
 
 @router.put("/travel-cards/{card_id}", response_model=TravelCardResponse)
-def update_travel_card_endpoint(
+async def update_travel_card_endpoint(
     card_id: str,
     request: TravelCardUpdateRequest,
-    current_user: dict = Depends(get_current_user)
+    if_match: str = Header(None),
+    check_conflicts: bool = Query(False, description="Reject with 409 if the trip or its hotel stays would overlap existing ones"),
+    current_user: dict = Depends(get_current_user),
+    uow: UnitOfWork = Depends(get_unit_of_work)
 ):
     user_id = current_user["user_id"]
     
+    expected_version = await check_if_match(user_id, card_id, if_match, uow)
+    
     # Verify card exists and belongs to user
-    existing_card = get_travel_card_by_id(card_id, user_id)
+    existing_card = await get_travel_card_by_id(card_id, user_id, uow)
     if not existing_card:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Travel card not found"
         )
     
-    # Validate dates if both provided
-    start_date = request.start_date or existing_card["start_date"]
-    end_date = request.end_date or existing_card["end_date"]
+    # Validate dates against the stored ones when only one side is provided
+    start_date = request.start_date or date.fromisoformat(existing_card["start_date"])
+    end_date = request.end_date or date.fromisoformat(existing_card["end_date"])
     
     if request.start_date and request.end_date:
         if request.end_date < request.start_date:
@@ -167,19 +614,36 @@ def update_travel_card_endpoint(
         )
     
     # Convert hotel/transport requests to dicts for service
-    hotels = [h.dict() for h in request.hotels] if request.hotels else None
-    transports = [t.dict() for t in request.transports] if request.transports else None
+    hotels = [h.dict() for h in request.hotels] if request.hotels is not None else None
+    transports = [t.dict() for t in request.transports] if request.transports is not None else None
     
-    updated_card = update_travel_card_with_nested(
-        card_id,
-        user_id,
-        destination=request.destination,
-        start_date=request.start_date,
-        end_date=request.end_date,
-        status=request.status,
-        hotels=hotels,
-        transports=transports
-    )
+    if check_conflicts:
+        await reject_conflicts(user_id, {
+            "id": card_id,
+            "destination": request.destination or existing_card.get("destination"),
+            "start_date": start_date,
+            "end_date": end_date,
+        }, hotels)
+    
+    try:
+        updated_card = await update_travel_card_with_nested(
+            card_id,
+            user_id,
+            destination=request.destination,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            status=request.status,
+            hotels=hotels,
+            transports=transports,
+            uow=uow,
+            expected_version=expected_version
+        )
+    except CardModified:
+        invalidate_cards(user_id, card_id)
+        raise _card_modified()
+    
+    # Invalidate even on failure: a partial write may have landed
+    invalidate_cards(user_id, card_id)
     
     if not updated_card:
         raise HTTPException(
@@ -187,34 +651,38 @@ def update_travel_card_endpoint(
             detail="Failed to update travel card"
         )
     
-    hotels_data = get_hotels_by_card(card_id)
-    transports_data = get_transports_by_card(card_id)
+    entry = _cache_entry(render_card(updated_card))
+    card_cache.set((user_id, card_id), entry)
     
-    return TravelCardResponse(
-        id=updated_card["id"],
-        user_id=updated_card["user_id"],
-        destination=updated_card["destination"],
-        start_date=updated_card["start_date"],
-        end_date=updated_card["end_date"],
-        duration_days=updated_card["duration_days"],
-        status=updated_card["status"],
-        hotels=hotels_data,
-        transports=transports_data,
-    )
+    body, etag = entry
+    if updated_card["changed"]:
+        card_events.publish(user_id, "updated", body)
+    return json_response(body, headers={"ETag": etag})
 
 @router.delete("/travel-cards/{card_id}")
-def delete_travel_card_endpoint(card_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_travel_card_endpoint(
+    card_id: str,
+    if_match: str = Header(None),
+    current_user: dict = Depends(get_current_user),
+    uow: UnitOfWork = Depends(get_unit_of_work)
+):
     user_id = current_user["user_id"]
     
+    expected_version = await check_if_match(user_id, card_id, if_match, uow)
+    
     # Verify card exists and belongs to user
-    existing_card = get_travel_card_by_id(card_id, user_id)
-    if not existing_card:
+    if not await travel_card_exists(card_id, user_id, uow):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Travel card not found"
         )
     
-    success = delete_travel_card(card_id, user_id)
+    try:
+        success = await delete_travel_card(card_id, user_id, uow, expected_version)
+    except CardModified:
+        invalidate_cards(user_id, card_id)
+        raise _card_modified()
+    invalidate_cards(user_id, card_id)
     
     if not success:
         raise HTTPException(
@@ -222,7 +690,149 @@ def delete_travel_card_endpoint(card_id: str, current_user: dict = Depends(get_c
             detail="Failed to delete travel card"
         )
     
+    publish_card_deleted(user_id, card_id)
     return {
         "success": True,
         "message": "Travel card deleted successfully"
     }
+
+NESTED_NOUNS = {"hotels": "hotel", "transports": "transport"}
+
+def _nested_written(table: str, user_id: str, card_id: str, action: str, row: dict) -> Response:
+    invalidate_cards(user_id, card_id)
+    body = render_nested_item(table, row)
+    card_events.publish(user_id, f"{NESTED_NOUNS[table]}_{action}", body)
+    return json_response(body)
+
+def _nested_write_failed(table: str, user_id: str, card_id: str, verb: str) -> HTTPException:
+    # The row was written but its card wasn't, so drop what's cached either way
+    invalidate_cards(user_id, card_id)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Failed to {verb} {NESTED_NOUNS[table]}"
+    )
+
+async def _create_nested(table: str, card_id: str, user_id: str, item: dict, background_tasks: BackgroundTasks) -> Response:
+    try:
+        row = await create_nested_item(table, card_id, user_id, item, defer=background_tasks.add_task)
+    except RuntimeError:
+        raise _nested_write_failed(table, user_id, card_id, "create")
+    if row is None:
+        # Inserts into someone else's card are refused too; only a failed
+        # write pays for telling the two apart
+        if not await travel_card_exists(card_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Travel card not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create {NESTED_NOUNS[table]}"
+        )
+    return _nested_written(table, user_id, card_id, "created", row)
+
+async def _update_nested(table: str, card_id: str, item_id: str, user_id: str, fields: dict, background_tasks: BackgroundTasks) -> Response:
+    noun = NESTED_NOUNS[table]
+    if not fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    
+    try:
+        row = await update_nested_item(table, card_id, item_id, user_id, fields, defer=background_tasks.add_task)
+    except RuntimeError:
+        raise _nested_write_failed(table, user_id, card_id, "update")
+    if row is None:
+        if not await nested_item_exists(table, card_id, item_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{noun.capitalize()} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update {noun}"
+        )
+    return _nested_written(table, user_id, card_id, "updated", row)
+
+async def _delete_nested(table: str, card_id: str, item_id: str, user_id: str, background_tasks: BackgroundTasks) -> dict:
+    noun = NESTED_NOUNS[table]
+    try:
+        deleted = await delete_nested_item(table, card_id, item_id, user_id, defer=background_tasks.add_task)
+    except RuntimeError:
+        raise _nested_write_failed(table, user_id, card_id, "delete")
+    if not deleted:
+        if not await nested_item_exists(table, card_id, item_id, user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{noun.capitalize()} not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete {noun}"
+        )
+    
+    invalidate_cards(user_id, card_id)
+    card_events.publish(user_id, f"{noun}_deleted", json.dumps({"id": item_id, "travel_card_id": card_id}, separators=(",", ":")).encode())
+    return {
+        "success": True,
+        "message": f"{noun.capitalize()} deleted successfully"
+    }
+
+@router.post("/travel-cards/{card_id}/hotels", response_model=HotelResponse)
+async def create_hotel(
+    card_id: str,
+    request: HotelRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _create_nested("hotels", card_id, current_user["user_id"], request.model_dump(exclude={"id"}), background_tasks)
+
+@router.patch("/travel-cards/{card_id}/hotels/{hotel_id}", response_model=HotelResponse)
+async def update_hotel(
+    card_id: str,
+    hotel_id: str,
+    request: HotelRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    fields = request.model_dump(exclude_unset=True, exclude={"id"})
+    return await _update_nested("hotels", card_id, hotel_id, current_user["user_id"], fields, background_tasks)
+
+@router.delete("/travel-cards/{card_id}/hotels/{hotel_id}")
+async def delete_hotel(
+    card_id: str,
+    hotel_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _delete_nested("hotels", card_id, hotel_id, current_user["user_id"], background_tasks)
+
+@router.post("/travel-cards/{card_id}/transports", response_model=TransportResponse)
+async def create_transport(
+    card_id: str,
+    request: TransportRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _create_nested("transports", card_id, current_user["user_id"], request.model_dump(exclude={"id"}), background_tasks)
+
+@router.patch("/travel-cards/{card_id}/transports/{transport_id}", response_model=TransportResponse)
+async def update_transport(
+    card_id: str,
+    transport_id: str,
+    request: TransportRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    fields = request.model_dump(exclude_unset=True, exclude={"id"})
+    return await _update_nested("transports", card_id, transport_id, current_user["user_id"], fields, background_tasks)
+
+@router.delete("/travel-cards/{card_id}/transports/{transport_id}")
+async def delete_transport(
+    card_id: str,
+    transport_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _delete_nested("transports", card_id, transport_id, current_user["user_id"], background_tasks)
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import uuid
+
+# Settings are read at import time, so point them at a throwaway SQLite file first
+_data_dir = tempfile.mkdtemp(prefix="raahi-tests-")
+os.environ.update(
+    STORAGE_BACKEND="sqlite",
+    SQLITE_PATH=os.path.join(_data_dir, "raahi.db"),
+    JWT_SECRET="test-secret",
+    BCRYPT_ROUNDS="4",
+    TOKEN_CACHE_MAX_ENTRIES="20",
+    # Small pages, so reads that span several of them are exercised
+    POSTGREST_MAX_ROWS="5",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from config import POSTGREST_MAX_ROWS
+from db.sqlite_client import SQLiteQuery
+from main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def register(client):
+    """Register a fresh user; returns (user_id, auth headers)."""
+    def register():
+        response = client.post("/api/auth/register", json={
+            "email": f"{uuid.uuid4().hex}@example.com",
+            "password": "password",
+            "full_name": "Test User",
+        })
+        assert response.status_code == 200, response.text
+        body = response.json()
+        return body["user_id"], {"Authorization": f"Bearer {body['token']}"}
+    return register
+
+@pytest.fixture
+def create_card(client):
+    """Create a card for the user behind ``headers``; fields override the defaults."""
+    def create_card(headers, **fields):
+        body = {"destination": "Lisbon", "status": "planning", "start_date": "2031-03-01", "end_date": "2031-03-05", **fields}
+        response = client.post("/api/travel-cards", json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create_card
+
+@pytest.fixture
+def max_rows(monkeypatch):
+    """Cut every select off at POSTGREST_MAX_ROWS rows, like PostgREST's max-rows."""
+    run_select = SQLiteQuery._run_select
+
+    def capped(self, conn):
+        response = run_select(self, conn)
+        response.data = response.data[:POSTGREST_MAX_ROWS]
+        return response
+
+    monkeypatch.setattr(SQLiteQuery, "_run_select", capped)
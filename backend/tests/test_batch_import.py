@@ -0,0 +1,41 @@
+import sqlite3
+from db.sqlite_client import SQLiteQuery
+
+def _card(destination, **fields):
+    return {"destination": destination, "status": "planning", "start_date": "2031-08-01", "end_date": "2031-08-03", **fields}
+
+def test_a_failed_item_is_rolled_back_and_the_rest_are_kept(client, register, db, monkeypatch):
+    user_id, headers = register()
+    run_insert = SQLiteQuery._run_insert
+
+    def failing(self, conn, row):
+        if self._table == "hotels" and row.get("hotel_name") == "Broken":
+            raise sqlite3.IntegrityError("constraint failed")
+        return run_insert(self, conn, row)
+
+    monkeypatch.setattr(SQLiteQuery, "_run_insert", failing)
+    items = [
+        _card("Lisbon", hotels=[{"hotel_name": "A", "total_cost": 100}]),
+        _card("Nowhere", end_date="2031-07-01"),
+        _card("Porto", hotels=[{"hotel_name": "Broken", "total_cost": 50}], transports=[{"transport_type": "train", "cost": 5}]),
+        _card("Faro", transports=[{"transport_type": "bus", "cost": 10}]),
+    ]
+    response = client.post("/api/travel-cards/batch", json=items, headers=headers)
+    monkeypatch.undo()
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 2)
+    assert [result["success"] for result in body["results"]] == [True, False, False, True]
+    assert body["results"][1]["error"] == "End date must be after start date"
+
+    cards = client.get("/api/travel-cards", headers=headers).json()
+    assert sorted((c["destination"], len(c["hotels"]), len(c["transports"])) for c in cards) == [("Faro", 0, 1), ("Lisbon", 1, 0)]
+    assert sorted(c["id"] for c in cards) == sorted(body["results"][i]["id"] for i in (0, 3))
+
+    # Nothing from the failed chunk or the failed retry is left behind
+    for table in ("travel_cards", "hotels", "transports"):
+        count = db.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id = ?", (user_id,)).fetchone()[0]
+        assert count == {"travel_cards": 2, "hotels": 1, "transports": 1}[table], table
+    stats = client.get("/api/travel-cards/stats", headers=headers).json()
+    assert stats["total"]["trip_count"] == 2
+    assert stats["total"]["total_cost"] == 110
@@ -0,0 +1,88 @@
+import json
+from config import POSTGREST_MAX_ROWS
+
+def test_nested_rows_past_max_rows_are_all_loaded(client, register, create_card, max_rows):
+    _, headers = register()
+    hotels = [{"hotel_name": f"Hotel {i}", "total_cost": 10} for i in range(2 * POSTGREST_MAX_ROWS + 1)]
+    transports = [{"transport_type": "train", "cost": 1} for _ in range(POSTGREST_MAX_ROWS)]
+    big = create_card(headers, hotels=hotels, transports=transports)
+    small = create_card(headers, destination="Porto", start_date="2031-04-01", end_date="2031-04-02", hotels=hotels[:1])
+    counts = {big["id"]: (len(hotels), len(transports)), small["id"]: (1, 0)}
+
+    cards = client.get("/api/travel-cards", headers=headers).json()
+    assert {c["id"]: (len(c["hotels"]), len(c["transports"])) for c in cards} == counts
+
+    summaries = client.get("/api/travel-cards", params={"view": "summary"}, headers=headers).json()
+    assert {c["id"]: (c["hotel_count"], c["transport_count"]) for c in summaries} == counts
+    assert summaries[0]["total_hotel_cost"] == 10 * len(hotels)
+
+    lines = client.get("/api/travel-cards/export", headers=headers).text.splitlines()
+    exported = [json.loads(line) for line in lines]
+    assert {c["id"]: (len(c["hotels"]), len(c["transports"])) for c in exported} == counts
+
+def _walk(client, headers, **params):
+    cards, cursor = [], None
+    while True:
+        response = client.get("/api/travel-cards", params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        cards.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return cards
+
+def test_keyset_pages_walk_ties_on_start_date_once_each(client, register, create_card, db):
+    _, other = register()
+    # Another user's cards on the tied date, sorting after and before every id
+    for card_id in ("ffffffff-ffff-ffff-ffff-ffffffffffff", "00000000-0000-0000-0000-000000000000"):
+        old_id = create_card(other, start_date="2031-05-01", end_date="2031-05-09")["id"]
+        db.execute("UPDATE travel_cards SET id = ? WHERE id = ?", (card_id, old_id))
+        db.commit()
+
+    _, headers = register()
+    starts = ["2031-05-01", "2031-05-01", "2031-05-01", "2031-05-02", "2031-05-02", "2031-05-03", "2031-05-01"]
+    ids = [create_card(headers, start_date=start, end_date="2031-05-09")["id"] for start in starts]
+    expected = sorted(zip(starts, ids))
+
+    walked = _walk(client, headers, limit=2)
+    assert [(c["start_date"], c["id"]) for c in walked] == expected
+
+    walked = _walk(client, headers, limit=3, sort="-start_date")
+    assert [(c["start_date"], c["id"]) for c in walked] == expected[::-1]
+
+def test_bad_cursor_is_rejected(client, register, create_card):
+    _, headers = register()
+    for start in ("2031-05-01", "2031-05-02"):
+        create_card(headers, start_date=start, end_date="2031-05-09")
+    cursor = client.get("/api/travel-cards", params={"limit": 1}, headers=headers).headers["X-Next-Cursor"]
+
+    for params in ({"cursor": "not-a-cursor"}, {"cursor": cursor, "sort": "end_date"}):
+        response = client.get("/api/travel-cards", params=params, headers=headers)
+        assert response.status_code == 400, response.text
+
+def test_summary_view_rolls_up_nested_rows(client, register, create_card):
+    _, headers = register()
+    full = create_card(
+        headers,
+        hotels=[{"hotel_name": "A", "total_cost": 120}, {"hotel_name": "B", "total_cost": None}, {"hotel_name": "C", "total_cost": 30.5}],
+        transports=[
+            {"transport_type": "train", "cost": 20, "departure_time": "2031-03-02T09:00"},
+            {"transport_type": "flight", "cost": 200, "departure_time": "2031-03-01T07:30"},
+            {"transport_type": "bus", "cost": None},
+        ],
+    )
+    empty = create_card(headers, destination="Porto", start_date="2031-04-01", end_date="2031-04-02")
+    expected = {
+        full["id"]: {"hotel_count": 3, "transport_count": 3, "total_hotel_cost": 150.5, "total_transport_cost": 220, "first_departure": "2031-03-01T07:30"},
+        empty["id"]: {"hotel_count": 0, "transport_count": 0, "total_hotel_cost": 0, "total_transport_cost": 0, "first_departure": None},
+    }
+
+    for params in ({"view": "summary"}, {"view": "summary", "limit": 1}):
+        summaries = _walk(client, headers, **params)
+        assert {c["id"]: {key: c[key] for key in expected[c["id"]]} for c in summaries} == expected
+        assert all("hotels" not in c and "transports" not in c for c in summaries)
+
+    # A nested write reaches the cached rollup
+    response = client.put(f"/api/travel-cards/{empty['id']}", json={"hotels": [{"hotel_name": "D", "total_cost": 80}]}, headers=headers)
+    assert response.status_code == 200, response.text
+    summaries = client.get("/api/travel-cards", params={"view": "summary"}, headers=headers).json()
+    assert [(c["hotel_count"], c["total_hotel_cost"]) for c in summaries if c["id"] == empty["id"]] == [(1, 80)]
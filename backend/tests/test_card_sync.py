@@ -0,0 +1,43 @@
+import sqlite3
+from db.sqlite_client import SQLiteClient
+
+def test_sync_pages_through_unversioned_cards(client, db, register, create_card):
+    user_id, headers = register()
+    ids = [create_card(headers, destination=f"City {i}")["id"] for i in range(5)]
+    db.execute("UPDATE travel_cards SET version = 0 WHERE user_id = ?", (user_id,))
+    db.commit()
+
+    seen, since = [], None
+    for _ in range(10):
+        params = {"limit": 2, **({"since": since} if since else {})}
+        response = client.get("/api/travel-cards/changes", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen.extend(card["id"] for card in body["changed"])
+        since = body["cursor"]
+        if not body["has_more"]:
+            break
+    else:
+        raise AssertionError("sync never caught up")
+    assert sorted(seen) == sorted(ids)
+
+def test_connect_stamps_unversioned_cards(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    storage = SQLiteClient(path)
+    storage.connect()
+    storage.close()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, email, password_hash, full_name) VALUES ('u1', 'a@example.com', 'x', 'A')")
+    conn.execute(
+        "INSERT INTO travel_cards (id, user_id, destination, start_date, end_date, duration_days, status, version)"
+        " VALUES ('c1', 'u1', 'Lisbon', '2031-03-01', '2031-03-05', 5, 'planning', 0)"
+    )
+    conn.commit()
+    conn.close()
+
+    storage.connect()
+    storage.close()
+    conn = sqlite3.connect(path)
+    (version,) = conn.execute("SELECT version FROM travel_cards WHERE id = 'c1'").fetchone()
+    conn.close()
+    assert version > 0
@@ -0,0 +1,59 @@
+from db.changeset import compute_changeset, resolve_rows
+
+COLUMNS = ("hotel_name", "total_cost")
+EXISTING = [
+    {"id": "h1", "hotel_name": "A", "total_cost": 100},
+    {"id": "h2", "hotel_name": "B", "total_cost": 200},
+    {"id": "h3", "hotel_name": "B", "total_cost": 200},
+]
+
+def test_empty_incoming_deletes_every_row():
+    changeset = compute_changeset(EXISTING, [], COLUMNS)
+    assert changeset.deletes == ["h1", "h2", "h3"]
+    assert changeset.inserts == changeset.updates == changeset.unchanged == []
+    assert resolve_rows(changeset, [], []) == []
+
+def test_reordered_rows_are_unchanged_and_keep_request_order():
+    incoming = [dict(row) for row in reversed(EXISTING)]
+    changeset = compute_changeset(EXISTING, incoming, COLUMNS)
+    assert changeset.is_empty()
+    assert [row["id"] for row in resolve_rows(changeset, [], [])] == ["h3", "h2", "h1"]
+
+def test_rows_without_ids_match_by_content():
+    incoming = [
+        {"hotel_name": "B", "total_cost": 200},
+        {"hotel_name": "C", "total_cost": 50},
+        {"hotel_name": "B", "total_cost": 200},
+    ]
+    changeset = compute_changeset(EXISTING, incoming, COLUMNS)
+    # Both copies of B are claimed once each; A has no match left
+    assert [row["id"] for row in changeset.unchanged] == ["h2", "h3"]
+    assert changeset.inserts == [{"hotel_name": "C", "total_cost": 50}]
+    assert changeset.deletes == ["h1"]
+    assert changeset.updates == []
+
+    inserted = [{"id": "h4", "hotel_name": "C", "total_cost": 50}]
+    assert [row["id"] for row in resolve_rows(changeset, [], inserted)] == ["h2", "h4", "h3"]
+
+def test_id_match_wins_over_content_match():
+    incoming = [{"hotel_name": "A", "total_cost": 100}, {"id": "h1", "hotel_name": "A", "total_cost": 150}]
+    changeset = compute_changeset(EXISTING, incoming, COLUMNS)
+    assert changeset.updates == [{"id": "h1", "hotel_name": "A", "total_cost": 150}]
+    assert changeset.inserts == [{"hotel_name": "A", "total_cost": 100}]
+    assert changeset.deletes == ["h2", "h3"]
+
+def test_put_with_empty_lists_removes_the_last_rows(client, register, create_card):
+    _, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}], transports=[{"transport_type": "train", "cost": 40}])
+
+    response = client.put(f"/api/travel-cards/{card['id']}", json={"destination": "Porto"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert [len(response.json()[key]) for key in ("hotels", "transports")] == [1, 1]
+
+    response = client.put(f"/api/travel-cards/{card['id']}", json={"hotels": [], "transports": []}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["hotels"] == response.json()["transports"] == []
+
+    stored = client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()
+    assert stored["hotels"] == stored["transports"] == []
+    assert client.get("/api/travel-cards/stats", headers=headers).json()["total"]["total_cost"] == 0
@@ -0,0 +1,19 @@
+from config import POSTGREST_MAX_ROWS
+
+def test_stays_past_max_rows_are_indexed(client, register, create_card, max_rows):
+    _, headers = register()
+    hotels = [
+        {"hotel_name": f"Hotel {i}", "check_in_date": f"2031-06-{i + 1:02d}", "check_out_date": f"2031-06-{i + 2:02d}"}
+        for i in range(POSTGREST_MAX_ROWS + 1)
+    ]
+    create_card(headers, hotels=hotels)
+
+    body = {
+        "destination": "Porto", "status": "planning", "start_date": "2031-07-01", "end_date": "2031-07-02",
+        "hotels": [{"hotel_name": "Long stay", "check_in_date": "2031-06-01", "check_out_date": "2031-06-30"}],
+    }
+    response = client.post("/api/travel-cards", params={"check_conflicts": True}, json=body, headers=headers)
+    assert response.status_code == 409, response.text
+    conflicts = response.json()["detail"]["conflicts"]
+    assert conflicts["trips"] == []
+    assert len(conflicts["hotels"]) == len(hotels)
@@ -0,0 +1,51 @@
+import gc
+from config import SSE_MAX_STREAMS_PER_USER
+from routes.travel_cards import card_events
+from utils.pubsub import EventHub
+
+def test_subscribe_refuses_past_the_limit():
+    hub = EventHub(queue_size=10, max_subscribers_per_key=2)
+    first = hub.subscribe("user")
+    second = hub.subscribe("user")
+    assert first is not None and second is not None
+    assert hub.subscribe("user") is None
+
+    hub.unsubscribe("user", first)
+    assert hub.subscribe("user") is not None
+
+def test_dropped_subscription_frees_its_slot():
+    hub = EventHub(queue_size=10, max_subscribers_per_key=1)
+    subscription = hub.subscribe("user")
+    assert hub.subscribe("user") is None
+
+    del subscription
+    gc.collect()
+    assert hub.subscribe("user") is not None
+
+def test_stream_is_refused_when_full(client, register):
+    user_id, headers = register()
+    held = [card_events.subscribe(user_id) for _ in range(SSE_MAX_STREAMS_PER_USER)]
+    try:
+        assert all(held)
+        response = client.get("/api/travel-cards/stream", headers=headers)
+        assert response.status_code == 429
+    finally:
+        for subscription in held:
+            card_events.unsubscribe(user_id, subscription)
+
+def test_unchanged_put_publishes_nothing(client, register, create_card):
+    user_id, headers = register()
+    card = create_card(headers)
+
+    subscription = card_events.subscribe(user_id)
+    try:
+        response = client.put(f"/api/travel-cards/{card['id']}", json={"destination": "Lisbon"}, headers=headers)
+        assert response.status_code == 200, response.text
+        assert subscription.queue.empty()
+
+        response = client.put(f"/api/travel-cards/{card['id']}", json={"destination": "Porto"}, headers=headers)
+        assert response.status_code == 200, response.text
+        event, _ = subscription.queue.get_nowait()
+        assert event == "updated"
+    finally:
+        card_events.unsubscribe(user_id, subscription)
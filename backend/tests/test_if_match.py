@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sqlite3
+import httpx
+from routes import travel_cards
+
+def _concurrently(client, *requests):
+    """Send requests to the app at the same time, on the app's own event loop."""
+    async def send_all():
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await asyncio.gather(*(http.request(method, url, **kwargs) for method, url, kwargs in requests))
+    return client.portal.call(send_all)
+
+def test_concurrent_puts_with_one_etag_let_only_one_through(client, register, create_card):
+    _, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    etag = client.get(f"/api/travel-cards/{card['id']}", headers=headers).headers["ETag"]
+
+    conditional = {**headers, "If-Match": etag}
+    responses = _concurrently(client, *(
+        ("PUT", f"/api/travel-cards/{card['id']}", {"json": {"destination": name, "hotels": [{"hotel_name": name}]}, "headers": conditional})
+        for name in ("Porto", "Faro")
+    ))
+    assert sorted(response.status_code for response in responses) == [200, 412]
+
+    winner = next(response.json() for response in responses if response.status_code == 200)
+    stored = client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()
+    assert stored == winner
+    assert [hotel["hotel_name"] for hotel in stored["hotels"]] == [stored["destination"]]
+
+def test_a_write_between_the_check_and_the_update_fails_the_precondition(client, register, create_card, monkeypatch):
+    _, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    etag = client.get(f"/api/travel-cards/{card['id']}", headers=headers).headers["ETag"]
+    check_if_match = travel_cards.check_if_match
+
+    async def then_someone_else_writes(*args):
+        version = await check_if_match(*args)
+        conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+        conn.execute("UPDATE travel_cards SET destination = 'Elsewhere', version = version + 1 WHERE id = ?", (card["id"],))
+        conn.commit()
+        conn.close()
+        return version
+
+    monkeypatch.setattr(travel_cards, "check_if_match", then_someone_else_writes)
+    conditional = {**headers, "If-Match": etag}
+    response = client.put(f"/api/travel-cards/{card['id']}", json={"status": "booked", "hotels": []}, headers=conditional)
+    assert response.status_code == 412, response.text
+    response = client.delete(f"/api/travel-cards/{card['id']}", headers=conditional)
+    assert response.status_code == 412, response.text
+    monkeypatch.undo()
+
+    stored = client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()
+    assert (stored["destination"], stored["status"], len(stored["hotels"])) == ("Elsewhere", "planning", 1)
+    changes = client.get("/api/travel-cards/changes", headers=headers).json()
+    assert changes["deleted"] == []
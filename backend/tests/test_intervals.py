@@ -0,0 +1,59 @@
+import random
+import pytest
+from utils.intervals import IntervalIndex
+
+def _index(closed, intervals):
+    index = IntervalIndex(closed=closed)
+    for key, (start, end) in intervals.items():
+        index.add(key, start, end, value=key.upper())
+    return index
+
+def _keys(results):
+    return sorted(key for key, _ in results)
+
+STAYS = {"a": ("2031-01-01", "2031-01-05"), "b": ("2031-01-05", "2031-01-08"), "c": ("2031-01-09", "2031-01-10")}
+
+def test_closed_intervals_overlap_on_a_shared_day():
+    index = _index(True, STAYS)
+    assert _keys(index.overlapping("2031-01-05", "2031-01-05")) == ["a", "b"]
+    assert _keys(index.overlapping("2031-01-08", "2031-01-09")) == ["b", "c"]
+    assert _keys(index.overlapping("2030-12-01", "2031-01-01")) == ["a"]
+    assert index.overlapping("2031-01-11", "2031-01-12") == []
+    assert [(a[0], b[0], start, end) for a, b, start, end in index.conflicts()] == [("a", "b", "2031-01-05", "2031-01-05")]
+
+def test_half_open_intervals_do_not_overlap_at_checkout():
+    index = _index(False, STAYS)
+    assert _keys(index.overlapping("2031-01-05", "2031-01-06")) == ["b"]
+    assert _keys(index.overlapping("2031-01-04", "2031-01-05")) == ["a"]
+    assert index.overlapping("2031-01-08", "2031-01-09") == []
+    assert index.overlapping("2030-12-01", "2031-01-01") == []
+    assert index.conflicts() == []
+
+def test_exclude_remove_and_replace():
+    index = _index(True, STAYS)
+    assert _keys(index.overlapping("2031-01-01", "2031-01-31", exclude={"b"})) == ["a", "c"]
+    index.remove("a")
+    index.add("c", "2031-01-02", "2031-01-03", value="moved")
+    assert len(index) == 2
+    assert index.entry("c") == ("2031-01-02", "2031-01-03")
+    assert index.overlapping("2031-01-01", "2031-01-04") == [("c", "moved")]
+
+@pytest.mark.parametrize("closed", [True, False])
+def test_queries_match_a_pairwise_scan(closed):
+    rng = random.Random(7)
+    intervals = {}
+    for i in range(200):
+        start = rng.randrange(100)
+        intervals[f"k{i}"] = (start, start + rng.randrange(10))
+    index = _index(closed, intervals)
+
+    def overlaps(a, b):
+        return a[0] <= b[1] and b[0] <= a[1] if closed else a[0] < b[1] and b[0] < a[1]
+
+    for _ in range(100):
+        start = rng.randrange(-5, 110)
+        query = (start, start + rng.randrange(10))
+        assert _keys(index.overlapping(*query)) == sorted(k for k, v in intervals.items() if overlaps(v, query))
+
+    pairs = {frozenset((a[0], b[0])) for a, b, _, _ in index.conflicts()}
+    assert pairs == {frozenset((k, j)) for k in intervals for j in intervals if k < j and overlaps(intervals[k], intervals[j])}
@@ -0,0 +1,19 @@
+from config import TOKEN_CACHE_MAX_ENTRIES
+from utils.jwt_handler import create_access_token, revoke_token, verify_token_cached
+
+def test_revoked_tokens_are_not_evicted_for_size():
+    tokens = [
+        create_access_token(f"user-{i}", f"user-{i}@example.com", "Test User")
+        for i in range(TOKEN_CACHE_MAX_ENTRIES + 1)
+    ]
+    for token in tokens:
+        assert verify_token_cached(token) is not None
+        revoke_token(token)
+
+    assert all(verify_token_cached(token) is None for token in tokens)
+
+def test_logout_rejects_the_token(client, register):
+    _, headers = register()
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
@@ -0,0 +1,72 @@
+import asyncio
+from db import card_sync
+from db.travel_card_service import create_nested_item
+
+def test_hotel_round_trip(client, register, create_card):
+    _, headers = register()
+    card = create_card(headers)
+    since = client.get("/api/travel-cards/changes", headers=headers).json()["cursor"]
+
+    response = client.post(f"/api/travel-cards/{card['id']}/hotels", json={"hotel_name": "A", "total_cost": 100}, headers=headers)
+    assert response.status_code == 200, response.text
+    hotel = response.json()
+    response = client.patch(f"/api/travel-cards/{card['id']}/hotels/{hotel['id']}", json={"total_cost": 60}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["hotel_name"] == "A"
+
+    # The stats refresh runs after the response
+    assert client.get("/api/travel-cards/stats", headers=headers).json()["total"]["hotel_cost"] == 60
+    changed = client.get("/api/travel-cards/changes", params={"since": since}, headers=headers).json()["changed"]
+    assert [c["id"] for c in changed] == [card["id"]]
+    assert changed[0]["hotels"][0]["total_cost"] == 60
+
+    response = client.delete(f"/api/travel-cards/{card['id']}/hotels/{hotel['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()["hotels"] == []
+    assert client.get("/api/travel-cards/stats", headers=headers).json()["total"]["hotel_cost"] == 0
+
+def test_other_users_cards_are_not_found(client, register, create_card):
+    _, owner = register()
+    _, other = register()
+    card = create_card(owner)
+    transport = client.post(f"/api/travel-cards/{card['id']}/transports", json={"transport_type": "train"}, headers=owner).json()
+
+    assert client.post(f"/api/travel-cards/{card['id']}/transports", json={"transport_type": "bus"}, headers=other).status_code == 404
+    assert client.patch(f"/api/travel-cards/{card['id']}/transports/{transport['id']}", json={"cost": 1}, headers=other).status_code == 404
+    assert client.delete(f"/api/travel-cards/{card['id']}/transports/{transport['id']}", headers=other).status_code == 404
+    assert client.get(f"/api/travel-cards/{card['id']}", headers=owner).json()["transports"][0]["cost"] is None
+
+def test_version_is_bumped_before_the_write_returns(client, db, register, create_card):
+    user_id, headers = register()
+    card = create_card(headers)
+    (before,) = db.execute("SELECT version FROM travel_cards WHERE id = ?", (card["id"],)).fetchone()
+
+    deferred = []
+    row = asyncio.run(create_nested_item("hotels", card["id"], user_id, {"hotel_name": "A", "total_cost": 100}, defer=lambda *task: deferred.append(task)))
+    assert row["hotel_name"] == "A"
+    (after,) = db.execute("SELECT version FROM travel_cards WHERE id = ?", (card["id"],)).fetchone()
+    assert after > before
+
+    # Only the stats refresh is left for later
+    assert len(deferred) == 1
+    assert client.get("/api/travel-cards/stats", headers=headers).json()["total"]["hotel_cost"] == 0
+    task, *args = deferred[0]
+    asyncio.run(task(*args))
+    assert client.get("/api/travel-cards/stats", headers=headers).json()["total"]["hotel_cost"] == 100
+
+def test_failed_version_bump_is_reported(client, register, create_card, monkeypatch):
+    _, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A"}])
+    hotel_id = client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()["hotels"][0]["id"]
+
+    def broken():
+        raise RuntimeError("clock went away")
+    monkeypatch.setattr(card_sync, "next_version", broken)
+    response = client.patch(f"/api/travel-cards/{card['id']}/hotels/{hotel_id}", json={"hotel_name": "B"}, headers=headers)
+    assert response.status_code == 500
+    response = client.delete(f"/api/travel-cards/{card['id']}/hotels/{hotel_id}", headers=headers)
+    assert response.status_code == 500
+    monkeypatch.undo()
+
+    # The row writes landed, and nothing cached hides them
+    assert client.get(f"/api/travel-cards/{card['id']}", headers=headers).json()["hotels"] == []
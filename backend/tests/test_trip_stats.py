@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import pytest
+from config import POSTGREST_MAX_ROWS
+from db.sqlite_client import SQLiteQuery
+from db.trip_stats_service import rebuild_trip_stats
+from db.user_service import get_all_user_ids
+
+def _forget_stats(db, user_id):
+    # As if the cards were written before trip_stats existed
+    db.execute("DELETE FROM trip_stats WHERE user_id = ?", (user_id,))
+    db.commit()
+
+def _totals(client, headers):
+    response = client.get("/api/travel-cards/stats", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["total"]
+
+def test_stats_are_built_on_read_for_cards_without_any(client, db, register, create_card):
+    user_id, headers = register()
+    create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    create_card(headers, transports=[{"transport_type": "train", "cost": 40}])
+    _forget_stats(db, user_id)
+
+    totals = _totals(client, headers)
+    assert totals["trip_count"] == 2
+    assert totals["hotel_cost"] == 100
+    assert totals["transport_cost"] == 40
+
+def test_writes_without_a_baseline_count_every_card(client, db, register, create_card):
+    user_id, headers = register()
+    first = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    create_card(headers)
+    _forget_stats(db, user_id)
+
+    response = client.post(f"/api/travel-cards/{first['id']}/hotels", json={"hotel_name": "B", "total_cost": 50}, headers=headers)
+    assert response.status_code == 200, response.text
+    create_card(headers, hotels=[{"hotel_name": "C", "total_cost": 25}])
+
+    totals = _totals(client, headers)
+    assert totals["trip_count"] == 3
+    assert totals["hotel_cost"] == 175
+
+def test_first_card_after_deleting_the_last(client, register, create_card):
+    _, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 10}])
+    assert client.delete(f"/api/travel-cards/{card['id']}", headers=headers).status_code == 200
+    assert _totals(client, headers)["trip_count"] == 0
+
+    create_card(headers, hotels=[{"hotel_name": "B", "total_cost": 30}])
+    totals = _totals(client, headers)
+    assert totals["trip_count"] == 1
+    assert totals["hotel_cost"] == 30
+
+def test_stats_past_max_rows_are_all_read(client, register, create_card, max_rows):
+    _, headers = register()
+    for i in range(POSTGREST_MAX_ROWS + 1):
+        create_card(headers, start_date=f"2031-{i + 1:02d}-01", end_date=f"2031-{i + 1:02d}-02")
+
+    stats = client.get("/api/travel-cards/stats", headers=headers).json()
+    assert stats["total"]["trip_count"] == POSTGREST_MAX_ROWS + 1
+    assert len(stats["trips"]) == POSTGREST_MAX_ROWS + 1
+    assert len(stats["by_month"]) == POSTGREST_MAX_ROWS + 1
+
+def test_every_user_is_listed_for_a_rebuild(client, db, register, max_rows):
+    for _ in range(POSTGREST_MAX_ROWS + 1):
+        register()
+    (count,) = db.execute("SELECT COUNT(*) FROM users").fetchone()
+
+    assert len(asyncio.run(get_all_user_ids())) == count
+
+def test_rebuild_overwrites_in_place_and_drops_stale_buckets(client, db, register, create_card):
+    user_id, headers = register()
+    kept = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    gone = create_card(headers, start_date="2031-05-01", end_date="2031-05-02")
+    _totals(client, headers)
+    db.execute("DELETE FROM travel_cards WHERE id = ?", (gone["id"],))
+    db.commit()
+
+    async def rebuild_twice():
+        return await asyncio.gather(rebuild_trip_stats(user_id), rebuild_trip_stats(user_id))
+    assert asyncio.run(rebuild_twice()) == [(1, 4), (1, 4)]
+
+    buckets = [row["bucket"] for row in db.execute("SELECT bucket FROM trip_stats WHERE user_id = ?", (user_id,))]
+    assert sorted(buckets) == sorted(["total", "status:planning", "month:2031-03", f"trip:{kept['id']}"])
+    totals = _totals(client, headers)
+    assert totals["trip_count"] == 1
+    assert totals["hotel_cost"] == 100
+
+def test_a_failed_rebuild_keeps_the_previous_rows(client, register, create_card, monkeypatch):
+    user_id, headers = register()
+    card = create_card(headers, hotels=[{"hotel_name": "A", "total_cost": 100}])
+    run_insert = SQLiteQuery._run_insert
+
+    def failing(self, conn, row):
+        if self._table == "trip_stats" and row["bucket"].startswith("trip:"):
+            raise sqlite3.OperationalError("disk I/O error")
+        return run_insert(self, conn, row)
+
+    monkeypatch.setattr(SQLiteQuery, "_run_insert", failing)
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(rebuild_trip_stats(user_id))
+    monkeypatch.undo()
+
+    stats = client.get("/api/travel-cards/stats", headers=headers).json()
+    assert [trip["card_id"] for trip in stats["trips"]] == [card["id"]]
+    assert stats["total"]["hotel_cost"] == 100
@@ -0,0 +1,25 @@
+def test_small_bodies_keep_the_identity_etag(client, register, create_card):
+    _, headers = register()
+    card = create_card(headers)
+
+    plain = client.get(f"/api/travel-cards/{card['id']}", headers={**headers, "Accept-Encoding": "identity"})
+    asked_gzip = client.get(f"/api/travel-cards/{card['id']}", headers={**headers, "Accept-Encoding": "gzip"})
+    assert len(asked_gzip.content) < 1024
+    assert "content-encoding" not in asked_gzip.headers
+    assert asked_gzip.headers["etag"] == plain.headers["etag"]
+    assert asked_gzip.content == plain.content
+
+def test_compressed_bodies_get_their_own_etag(client, register, create_card):
+    _, headers = register()
+    hotels = [{"hotel_name": f"Hotel {i}", "location": "Somewhere long enough to matter"} for i in range(20)]
+    card = create_card(headers, hotels=hotels)
+
+    response = client.get(f"/api/travel-cards/{card['id']}", headers={**headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-json-gzip"')
+    assert response.json()["id"] == card["id"]
+
+    etag = response.headers["etag"]
+    cached = client.get(f"/api/travel-cards/{card['id']}", headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
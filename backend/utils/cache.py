@@ -0,0 +1,112 @@
+import heapq
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a fixed TTL.
+
+    Loads that race with an invalidation are discarded: read the key's version
+    with ``version()`` before loading and pass it to ``set()``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def version(self, key) -> int:
+        return self._versions.get(key, 0)
+
+    def set(self, key, value, version: int = None, ttl: float = None):
+        if version is not None and version != self.version(key):
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.maxsize:
+            self._versions.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+class ExpiringSet:
+    """Set whose members each leave at their own expiry and never earlier.
+
+    Unlike TTLCache there is no size bound to evict for, so it suits
+    denylists, where dropping an entry early would let it back in.
+    """
+
+    def __init__(self):
+        self._expires_at = {}
+        # (expires_at, key), soonest first; stale pairs are skipped when popped
+        self._expiry_heap = []
+        self.hits = 0
+        self.misses = 0
+
+    def _prune(self, now: float):
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            if self._expires_at.get(key) == expires_at:
+                del self._expires_at[key]
+
+    def add(self, key, ttl: float):
+        now = time.monotonic()
+        self._prune(now)
+        expires_at = now + ttl
+        if expires_at > self._expires_at.get(key, now):
+            self._expires_at[key] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, key))
+
+    def __contains__(self, key) -> bool:
+        expires_at = self._expires_at.get(key)
+        if expires_at is None or expires_at <= time.monotonic():
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def stats(self) -> dict:
+        self._prune(time.monotonic())
+        return {
+            "size": len(self._expires_at),
+            "maxsize": None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": 0,
+        }
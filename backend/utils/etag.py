@@ -0,0 +1,30 @@
+import hashlib
+import re
+
+# Representations of one body (see utils.wire_format) share its ETag plus a
+# suffix such as -json-gzip or -msgpack-br
+_VARIANT_SUFFIX = re.compile(r'-(json|msgpack)(-(gzip|br))?"$')
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag for a rendered response body, derived from its content."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def base_etag(etag: str) -> str:
+    """The body's ETag for any of its representations' ETags."""
+    return _VARIANT_SUFFIX.sub('"', etag)
+
+def etag_matches(header: str, etag: str, weak: bool = True) -> bool:
+    """Check an If-None-Match (weak comparison) or If-Match (strong) header value."""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag or base_etag(candidate) == etag:
+            return True
+    return False
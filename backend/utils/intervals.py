@@ -0,0 +1,83 @@
+import bisect
+import heapq
+from itertools import accumulate
+
+class IntervalIndex:
+    """Intervals kept sorted by start, for overlap queries without pairwise scans.
+
+    ``closed`` intervals include their end (trip dates); otherwise they are
+    half-open, so a stay ending on the day the next one starts doesn't overlap
+    (hotel check-out/check-in). Bounds only need to be comparable, e.g. ISO
+    date strings; keys are strings (row ids).
+    """
+
+    def __init__(self, closed: bool = True):
+        self.closed = closed
+        self._entries = []  # sorted (start, end, key)
+        self._values = {}   # key -> (entry, value)
+        self._max_end = None  # running max of end over _entries, rebuilt lazily
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _overlaps(self, start_a, end_a, start_b, end_b) -> bool:
+        if self.closed:
+            return start_a <= end_b and start_b <= end_a
+        return start_a < end_b and start_b < end_a
+
+    def add(self, key: str, start, end, value=None):
+        """Insert or replace ``key``; ``value`` is returned alongside it by queries."""
+        self.remove(key)
+        entry = (start, end, key)
+        bisect.insort(self._entries, entry)
+        self._values[key] = (entry, value)
+        self._max_end = None
+
+    def remove(self, key: str):
+        found = self._values.pop(key, None)
+        if found is None:
+            return
+        del self._entries[bisect.bisect_left(self._entries, found[0])]
+        self._max_end = None
+
+    def entry(self, key: str) -> tuple:
+        """(start, end) of ``key``."""
+        start, end, _ = self._values[key][0]
+        return start, end
+
+    def overlapping(self, start, end, exclude=()) -> list:
+        """(key, value) of every interval overlapping [start, end] (or [start, end))."""
+        if self._max_end is None:
+            self._max_end = list(accumulate((e[1] for e in self._entries), max))
+        # Entries starting after ``end`` can't overlap. Walking back from there,
+        # stop once no earlier entry reaches ``start``.
+        hi = bisect.bisect_right(self._entries, end, key=lambda e: e[0])
+        results = []
+        for i in range(hi - 1, -1, -1):
+            if self._max_end[i] < start:
+                break
+            entry_start, entry_end, key = self._entries[i]
+            if key not in exclude and self._overlaps(start, end, entry_start, entry_end):
+                results.append((key, self._values[key][1]))
+        return results
+
+    def conflicts(self) -> list:
+        """Every overlapping pair as ((key, value), (key, value), overlap start, overlap end).
+
+        One sweep in start order with a heap of active ends:
+        O(n log n + number of overlaps).
+        """
+        pairs = []
+        active = []  # heap of (end, start, key)
+        for start, end, key in self._entries:
+            while active and (active[0][0] < start if self.closed else active[0][0] <= start):
+                heapq.heappop(active)
+            for other_end, other_start, other_key in active:
+                pairs.append((
+                    (other_key, self._values[other_key][1]),
+                    (key, self._values[key][1]),
+                    max(start, other_start),
+                    min(end, other_end),
+                ))
+            heapq.heappush(active, (end, start, key))
+        return pairs
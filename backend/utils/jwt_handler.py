@@ -1,6 +1,15 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRATION_HOURS
+from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRATION_HOURS, TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_TTL_SECONDS
+from utils.cache import ExpiringSet, TTLCache
+
+# Payloads of tokens that already passed verification, keyed by token digest
+_verified_tokens = TTLCache(maxsize=TOKEN_CACHE_MAX_ENTRIES, ttl=TOKEN_CACHE_TTL_SECONDS)
+# Logged-out tokens; kept until they would have expired anyway, however many
+# there are (a size bound would let the oldest logouts work again)
+_revoked_tokens = ExpiringSet()
 
 def create_access_token(user_id: str, email: str, full_name: str) -> str:
     payload = {
@@ -19,6 +28,44 @@ def verify_token(token: str) -> dict:
     except JWTError:
         return None
 
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _seconds_until_exp(payload: dict) -> float:
+    exp = payload.get("exp")
+    return exp - time.time() if exp is not None else TOKEN_CACHE_TTL_SECONDS
+
+def verify_token_cached(token: str) -> dict:
+    """verify_token with a bounded cache of verified payloads and revocation."""
+    digest = _token_digest(token)
+    if digest in _revoked_tokens:
+        return None
+
+    payload = _verified_tokens.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = verify_token(token)
+    if payload:
+        remaining = _seconds_until_exp(payload)
+        if remaining > 0:
+            _verified_tokens.set(digest, payload, ttl=remaining)
+    return payload
+
+def revoke_token(token: str):
+    digest = _token_digest(token)
+    _verified_tokens.invalidate(digest)
+    payload = verify_token(token)
+    remaining = _seconds_until_exp(payload) if payload else 0
+    if remaining > 0:
+        _revoked_tokens.add(digest, remaining)
+
+def get_token_cache_stats() -> dict:
+    return {
+        "verified": _verified_tokens.stats(),
+        "revoked": _revoked_tokens.stats(),
+    }
+
 def extract_token_from_header(authorization: str) -> str:
     if not authorization:
         return None
@@ -0,0 +1,119 @@
+"""In-process request metrics rendered in the Prometheus text format."""
+import time
+from db.query_stats import track_request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_CALL_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][i] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            base = dict(zip(self.label_names, labels))
+            for bound, count in zip(self.buckets, series["buckets"]):
+                lines.append(f"{self.name}_bucket{format_labels({**base, 'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{format_labels({**base, 'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{format_labels(base)} {series['sum']}")
+            lines.append(f"{self.name}_count{format_labels(base)} {series['count']}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+def render_metric(name: str, metric_type: str, help_text: str, samples: list) -> list:
+    """Render a counter or gauge from (labels dict, value) samples."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{format_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+ROUTE_LABELS = ("method", "route", "status")
+request_latency = Histogram("raahi_request_duration_seconds", "Time to serve a request", ROUTE_LABELS, LATENCY_BUCKETS)
+request_db_calls = Histogram("raahi_request_db_calls", "Database round trips made while serving a request", ROUTE_LABELS, DB_CALL_BUCKETS)
+request_db_time = Histogram("raahi_request_db_duration_seconds", "Time spent in database round trips per request", ROUTE_LABELS, LATENCY_BUCKETS)
+response_size = Histogram("raahi_response_size_bytes", "Response body size", ROUTE_LABELS, SIZE_BUCKETS)
+
+def render_request_metrics() -> list:
+    lines = []
+    for histogram in (request_latency, request_db_calls, request_db_time, response_size):
+        lines.extend(histogram.render())
+    return lines
+
+def route_template(scope) -> str:
+    """The matched route's path template, e.g. /api/travel-cards/{card_id}."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = route.path
+    # Some FastAPI versions report included routes without their router
+    # prefix; recover it from the part of the real path the template doesn't cover
+    rendered = template
+    for name, value in scope.get("path_params", {}).items():
+        rendered = rendered.replace("{" + name + "}", str(value))
+    path = scope["path"]
+    if path != rendered and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+class MetricsMiddleware:
+    """Time each HTTP request, count its database round trips and add a Server-Timing header.
+
+    Label values use the matched route template, not the raw path, so card ids
+    don't explode the number of series. Work done after the response starts
+    (streamed bodies) is included in the histograms but not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        db = track_request()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timing = f'app;dur={elapsed_ms:.1f}, db;dur={db["seconds"] * 1000:.1f};desc="{db["count"]} calls"'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            labels = (scope["method"], route_template(scope), str(state["status"]))
+            request_latency.observe(labels, time.perf_counter() - started)
+            request_db_calls.observe(labels, db["count"])
+            request_db_time.observe(labels, db["seconds"])
+            response_size.observe(labels, state["bytes"])
@@ -0,0 +1,27 @@
+import base64
+import json
+
+def encode_cursor(sort: str, value, row_id: str) -> str:
+    """Opaque keyset cursor pointing just past (value, row_id) under the given sort."""
+    raw = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """Return (value, row_id); raises ValueError for malformed or mismatched cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return value, row_id
+
+def quote_filter_value(value) -> str:
+    # Double-quote values inside PostgREST logic filters so commas and parens are safe
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+def escape_like(value: str) -> str:
+    # PostgREST treats * as a wildcard too, so it can't be matched literally
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("*", "")
@@ -1,9 +1,88 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
 import bcrypt
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
 
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; callers should shed the request."""
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password.encode(), salt)
     return hashed.decode()
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
+
+def hash_rounds(hashed: str) -> int:
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_rounds(hashed) != BCRYPT_ROUNDS
+
+# bcrypt is deliberately slow, so it runs in its own process pool instead of
+# the threadpool and event loop that serve the rest of the API
+_executor = None
+_pending = 0
+_stats = {
+    operation: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "rejected": 0}
+    for operation in ("hash", "verify")
+}
+
+def start_password_pool():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+
+def shutdown_password_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run(operation: str, fn, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        _stats[operation]["rejected"] += 1
+        raise PasswordHashingBusy()
+
+    _pending += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        # Falls back to the default thread pool if the process pool isn't started
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+        elapsed = time.perf_counter() - started
+        stats = _stats[operation]
+        stats["count"] += 1
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+async def hash_password_async(password: str) -> str:
+    return await _run("hash", hash_password, password, BCRYPT_ROUNDS)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run("verify", verify_password, password, hashed)
+
+def _spawn_check() -> bool:
+    return True
+
+async def warm_password_pool():
+    """Spawn every hashing worker now instead of on the first login."""
+    if _executor is None:
+        return
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(_executor, _spawn_check) for _ in range(PASSWORD_HASH_WORKERS)))
+
+def get_hashing_stats() -> dict:
+    return {
+        "pending": _pending,
+        **{operation: dict(stats) for operation, stats in _stats.items()},
+    }
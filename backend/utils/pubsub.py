@@ -0,0 +1,96 @@
+"""In-process fan-out of events to per-key subscribers (one queue each).
+
+Publishing never blocks: a subscriber whose bounded queue is full has its
+backlog dropped and replaced by a single ``RESYNC`` event, and nothing more
+is queued for it until it has read that. A stalled client therefore costs
+at most ``queue_size`` events of memory and catches up from the database.
+
+Events only reach subscribers in the same worker process.
+"""
+import asyncio
+import weakref
+
+RESYNC = ("resync", b"{}")
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    async def get(self, timeout: float):
+        """Next (event, data) pair, or None if nothing arrives within ``timeout``."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is RESYNC:
+            self.overflowed = False
+        return event
+
+class EventHub:
+    def __init__(self, queue_size: int, max_subscribers_per_key: int):
+        self.queue_size = queue_size
+        self.max_subscribers_per_key = max_subscribers_per_key
+        self._subscribers = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.overflows = 0
+
+    def subscribe(self, key):
+        """A new Subscription for ``key``, or None if it already has the maximum.
+
+        Subscriptions are held weakly, so one dropped without ``unsubscribe``
+        (say, a stream whose response never started) frees its slot anyway.
+        """
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            subscribers = self._subscribers[key] = weakref.WeakSet()
+        if len(subscribers) >= self.max_subscribers_per_key:
+            return None
+        subscription = Subscription(self.queue_size)
+        subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, key, subscription: Subscription):
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[key]
+
+    def has_subscribers(self, key) -> bool:
+        return bool(self._subscribers.get(key))
+
+    def publish(self, key, event: str, data: bytes):
+        self.published += 1
+        for subscription in list(self._subscribers.get(key, ())):
+            if subscription.overflowed:
+                self.dropped += 1
+                continue
+            try:
+                subscription.queue.put_nowait((event, data))
+                self.delivered += 1
+            except asyncio.QueueFull:
+                # Too far behind to replay; tell it to resync instead
+                self.dropped += subscription.queue.qsize() + 1
+                self.overflows += 1
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(RESYNC)
+                subscription.overflowed = True
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(1 for s in self._subscribers.values() if s),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+        }
+
+def format_event(event: str, data: bytes) -> bytes:
+    """One Server-Sent Events message; ``data`` must be a single line (e.g. compact JSON)."""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
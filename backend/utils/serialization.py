@@ -0,0 +1,51 @@
+"""Render travel card rows from our own database straight to JSON bytes.
+
+The rows are validated once, in bulk, by a prebuilt TypeAdapter and dumped by
+pydantic-core, so routes can hand the bytes back without FastAPI validating
+and encoding the same data a second time through ``response_model``.
+"""
+from typing import List
+from pydantic import TypeAdapter
+from models.travel_card import TravelCardResponse, TravelCardSummaryResponse, TravelCardChangesResponse, HotelResponse, TransportResponse
+
+_card_adapter = TypeAdapter(TravelCardResponse)
+_card_list_adapters = {
+    "full": TypeAdapter(List[TravelCardResponse]),
+    "summary": TypeAdapter(List[TravelCardSummaryResponse]),
+}
+_changes_adapter = TypeAdapter(TravelCardChangesResponse)
+_nested_adapters = {"hotels": TypeAdapter(HotelResponse), "transports": TypeAdapter(TransportResponse)}
+
+def _ordered(card: dict) -> dict:
+    # Nested rows have no meaningful order; sorting them keeps the body, and
+    # so the ETag derived from it, stable across reads
+    card = dict(card)
+    for key in ("hotels", "transports"):
+        if card.get(key):
+            card[key] = sorted(card[key], key=lambda row: row["id"])
+    return card
+
+def render_card(card: dict) -> bytes:
+    return _card_adapter.dump_json(_card_adapter.validate_python(_ordered(card)))
+
+def render_nested_item(table: str, row: dict) -> bytes:
+    """Render one hotel or transport row."""
+    adapter = _nested_adapters[table]
+    return adapter.dump_json(adapter.validate_python(row))
+
+def render_card_lines(cards: list) -> bytes:
+    """Render cards as NDJSON, one fully nested card per line."""
+    return b"".join(render_card(card) + b"\n" for card in cards)
+
+def render_cards(cards: list, view: str = "full") -> bytes:
+    adapter = _card_list_adapters[view]
+    return adapter.dump_json(adapter.validate_python([_ordered(card) for card in cards]))
+
+def render_changes(cards: list, deleted: list, cursor: str, has_more: bool) -> bytes:
+    changes = _changes_adapter.validate_python({
+        "changed": [_ordered(card) for card in cards],
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": has_more,
+    })
+    return _changes_adapter.dump_json(changes)
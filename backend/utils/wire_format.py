@@ -0,0 +1,194 @@
+"""Negotiated wire formats for JSON API responses.
+
+Clients pick the representation with standard headers:
+
+- ``Accept: application/msgpack`` gets the same document as MessagePack
+- ``Accept-Encoding: br`` / ``gzip`` gets the body compressed, once it is at
+  least ``COMPRESSION_MIN_BYTES`` long (smaller bodies aren't worth the CPU)
+
+Each representation carries its own ETag (the card ETag plus a suffix), and
+encoded bodies are cached by ETag so a cached card isn't recompressed on
+every poll.
+"""
+import gzip
+import json
+import time
+import brotli
+import msgpack
+from config import COMPRESSION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY, CARD_CACHE_TTL_SECONDS, CARD_CACHE_MAX_CARDS
+from utils.cache import TTLCache
+from utils.etag import base_etag
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+def _qvalues(header: str) -> dict:
+    """Parse an Accept-style header into {token: q}."""
+    values = {}
+    for part in (header or "").split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        values[token.lower()] = max(q, values.get(token.lower(), 0.0))
+    return values
+
+def choose_media_type(accept: str) -> str:
+    if not accept:
+        return JSON_MEDIA_TYPE
+    q = _qvalues(accept)
+    # Only an explicit msgpack entry selects it; wildcards mean JSON
+    q_msgpack = max(q.get(alias, 0.0) for alias in _MSGPACK_ALIASES)
+    q_json = max(q.get(JSON_MEDIA_TYPE, 0.0), q.get("application/*", 0.0), q.get("*/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if q_msgpack > 0 and q_msgpack >= q_json else JSON_MEDIA_TYPE
+
+def choose_coding(accept_encoding: str):
+    """"br", "gzip" or None (identity), preferring brotli on a tie."""
+    q = _qvalues(accept_encoding)
+    wildcard = q.get("*", 0.0)
+    candidates = [("br", q.get("br", wildcard)), ("gzip", q.get("gzip", wildcard))]
+    coding, best = max(candidates, key=lambda c: c[1])
+    return coding if best > 0 else None
+
+def format_name(media_type: str, coding: str = None) -> str:
+    name = "msgpack" if media_type == MSGPACK_MEDIA_TYPE else "json"
+    return f"{name}+{coding}" if coding else name
+
+def variant_etag(etag: str, media_type: str, coding: str = None) -> str:
+    suffix = format_name(media_type, coding).replace("+", "-")
+    if suffix == "json" or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{suffix}"'
+
+def not_modified_etag(etag: str, if_none_match: str, media_type: str) -> str:
+    """ETag for a 304: the representation the client says it already holds."""
+    for candidate in (if_none_match or "").split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate != "*" and base_etag(candidate) == etag:
+            return candidate
+    return variant_etag(etag, media_type)
+
+def encode_body(body: bytes, media_type: str, coding: str = None) -> bytes:
+    """Re-encode a JSON body as ``media_type`` and compress it with ``coding``."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        body = msgpack.packb(json.loads(body))
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if coding == "gzip":
+        # mtime=0 keeps the output deterministic for the same input
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+# Encoded bodies keyed by (representation ETag, format); the ETag is a content hash,
+# so entries never go stale, they just age out
+encoded_cache = TTLCache(maxsize=CARD_CACHE_MAX_CARDS, ttl=CARD_CACHE_TTL_SECONDS)
+
+_stats = {}
+
+def _record(name: str, json_bytes: int, wire_bytes: int, seconds: float):
+    stats = _stats.get(name)
+    if stats is None:
+        stats = _stats[name] = {"responses": 0, "json_bytes": 0, "wire_bytes": 0, "encode_seconds": 0.0}
+    stats["responses"] += 1
+    stats["json_bytes"] += json_bytes
+    stats["wire_bytes"] += wire_bytes
+    stats["encode_seconds"] += seconds
+
+def get_wire_format_stats() -> dict:
+    """Per format: responses sent, JSON bytes in, bytes on the wire and encode time."""
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+def _with_headers(headers: list, replace: dict) -> list:
+    names = {name.lower() for name in replace}
+    return [(k, v) for k, v in headers if k.lower() not in names] + list(replace.items())
+
+def _vary(headers: list) -> bytes:
+    existing = [v.decode("latin-1") for k, v in headers if k.lower() == b"vary"]
+    values = [v.strip() for header in existing for v in header.split(",") if v.strip()]
+    for name in ("Accept", "Accept-Encoding"):
+        if name.lower() not in (v.lower() for v in values):
+            values.append(name)
+    return ", ".join(values).encode("latin-1")
+
+class WireFormatMiddleware:
+    """Serve JSON responses under ``path_prefix`` in the negotiated format.
+
+    Only complete ``application/json`` bodies are re-encoded; streamed and
+    other responses pass through untouched.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/travel-cards", minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        media_type = choose_media_type(request_headers.get(b"accept"))
+        coding = choose_coding(request_headers.get(b"accept-encoding"))
+        state = {"start": None, "chunks": [], "passthrough": False}
+
+        async def send_encoded(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                by_name = {k.lower(): v for k, v in headers}
+                content_type = by_name.get(b"content-type", b"")
+                replace = {b"vary": _vary(headers)}
+                etag = by_name.get(b"etag")
+                if etag and message["status"] == 304:
+                    replace[b"etag"] = not_modified_etag(etag.decode("latin-1"), request_headers.get(b"if-none-match"), media_type).encode("latin-1")
+                message = {**message, "headers": _with_headers(headers, replace)}
+                if content_type.split(b";")[0].strip() != JSON_MEDIA_TYPE.encode() or message["status"] == 304:
+                    state["passthrough"] = True
+                    await send(message)
+                    return
+                # The ETag variant waits for the body: small ones aren't compressed
+                state["start"] = message
+                return
+
+            state["chunks"].append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(state["chunks"])
+            start = state["start"]
+            headers = {k.lower(): v for k, v in start["headers"]}
+            wire_coding = coding if len(body) >= self.minimum_size else None
+            name = format_name(media_type, wire_coding)
+
+            cache_key = (headers[b"etag"], name) if b"etag" in headers and name != "json" else None
+            wire_body = encoded_cache.get(cache_key) if cache_key else None
+            started = time.perf_counter()
+            if wire_body is None:
+                wire_body = encode_body(body, media_type, wire_coding)
+                if cache_key:
+                    encoded_cache.set(cache_key, wire_body)
+            _record(name, len(body), len(wire_body), time.perf_counter() - started)
+
+            replace = {b"content-length": str(len(wire_body)).encode()}
+            if b"etag" in headers:
+                replace[b"etag"] = variant_etag(headers[b"etag"].decode("latin-1"), media_type, wire_coding).encode("latin-1")
+            if media_type != JSON_MEDIA_TYPE:
+                replace[b"content-type"] = media_type.encode()
+            if wire_coding:
+                replace[b"content-encoding"] = wire_coding.encode()
+            await send({**start, "headers": _with_headers(start["headers"], replace)})
+            await send({"type": "http.response.body", "body": wire_body})
+
+        await self.app(scope, receive, send_encoded)